@@ -1,18 +1,101 @@
+import time
+STARTED = time.perf_counter()  # Before the other imports, so the time to first frame includes them
+
 import pygame
 import cv2
 import numpy as np
-import time
-from moviepy import VideoFileClip, AudioFileClip
+import os
+import random
+import subprocess
+import sys
+import imageio_ffmpeg
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from AudioRecorder import AudioRecorder
-from Sprite import Player, Block
+from CameraCapture import CameraCapture, CameraSurface
+from VideoEncoder import VideoEncoder
+from FFmpegWriter import FFmpegWriter
+from ProcessPipeline import ProcessCameraCapture, ProcessAudioRecorder, ProcessVideoEncoder
+from TextCache import TextCache
+from World import Camera, World
+from Level import ENDLESS, LEVEL_FILE, LevelStreamer, endless_chunks, open_level
+from LevelCompositor import LevelCompositor
+from FrameTimer import FrameTimer
+from InputTrace import TraceWriter, CAMERA_FILE
+from MediaClock import MediaClock
+from QualityGovernor import QualityGovernor, QUALITY_LEVELS
+from Assets import assets, binary_alpha, GAME_ASSETS
+from Sprite import Player
 
 class Game:
     """
     The most important class in the game. This class will handle the game loop, the player, the platforms, and the game logic.
     Since the nature of the loop of the Cv2 and the Pygame is different, we need to make sure that the game loop is running in the Pygame.
+    record_mode: str, default="stream" - How the session is recorded:
+        - "stream": video and audio are piped into one ffmpeg process while playing, final_output.avi is ready when the game ends.
+        - "legacy": XVID output.avi + output.wav, combined afterwards by combine_audio_video.
+    postprocess: str, default="remux" - The combine_audio_video mode used by the "legacy" record mode.
+    postprocess_threads: int, default=0 - The x264 encoder threads of that post-processing, 0 lets ffmpeg pick one per core.
+    camera: int, str or object, default=0 - The camera given to CameraCapture, e.g. a SyntheticCamera from Sources.py.
+    audio_stream: object, default=None - The input stream given to AudioRecorder, None opens the microphone.
+    audio_options: dict, default=None - Extra AudioRecorder arguments, e.g. {"mode": "blocking", "frames_per_buffer": 1048}.
+    fps: int, default=60 - The maximum render frame rate, None runs unthrottled with one simulation tick per frame (for benchmarks).
+    tick_rate: int, default=15 - The fixed simulation rate, which is also the frame rate of the recording.
+    countdown_seconds: float, default=3 - The countdown before the game starts.
+    message_duration: float, default=3 - How long the final message stays on screen.
+    output_dir: str, default="output" - Where the recordings are written.
+    audio_codec: str, default="wav" - The codec of the microphone recording, "wav" or "flac" (output.wav / output.flac).
+    show_timings: bool, default=False - Show the per-stage frame timings on screen (toggle with F3 while playing).
+    pipeline: str, default="threads" - Where the capture, audio and encoding work runs:
+        - "threads": background threads of the game process.
+        - "processes": worker processes sharing the frames through shared memory (see ProcessPipeline.py), the game process
+          only simulates and composites. camera and audio_stream must then be picklable.
+    adaptive_quality: bool, default=True - Let a QualityGovernor lower the quality when frames take longer than a tick
+        (1 / tick_rate, a slot of the recording). Slower frames only lower the render fps (needs an fps).
+    seed: int, default=None - Seed of the game's random generator (self.rng), None picks one. It is saved in the replay trace.
+    trace: bool, default=False - Write the replay trace (replay.jsonl) and the raw camera stream (camera.avi) to output_dir,
+        so the session can be re-rendered offline with Replay.py.
+    live: bool, default=True - False creates the game without camera, microphone or recording, for offline replays.
+    level: str, default=LEVEL_FILE - The level file to play (see Level.py), or "endless" (ENDLESS) for an endless run
+        through a procedural level generated from the seed.
     """
-    def __init__(self):
-        pygame.init()
+    def __init__(self, record_mode="stream", postprocess="remux", postprocess_threads=0, camera=0, audio_stream=None, audio_options=None, fps=60,
+                 tick_rate=15, countdown_seconds=3, message_duration=3, output_dir="output", audio_codec="wav",
+                 show_timings=False, pipeline="threads",
+                 adaptive_quality=True, seed=None, trace=False, live=True, level=LEVEL_FILE):
+        init_start = time.perf_counter()
+        assets.preload(GAME_ASSETS)  # Decode every image in the background while pygame and the devices start
+
+        ## Video Recorder
+        if pipeline not in ("threads", "processes"):
+            raise ValueError(f"Unknown pipeline {pipeline!r}, expected 'threads' or 'processes'")
+        self.pipeline = pipeline
+        self.record_mode = record_mode
+        self.postprocess = postprocess
+        self.postprocess_threads = postprocess_threads
+        self.audio_path = os.path.join(output_dir, f"output.{audio_codec}")
+        # Video frames and audio blocks are both stamped with perf_counter and placed by this clock, so they can't drift apart
+        self.media_clock = MediaClock(tick_rate, 44100)
+        # The writers are created through a factory, so the encoder worker process can create its own
+        if record_mode == "stream":
+            writer = partial(FFmpegWriter, os.path.join(output_dir, "final_output.avi"), (640, 480), fps=tick_rate, rate=44100)
+        elif record_mode == "legacy":
+            self.fourcc = cv2.VideoWriter_fourcc(*"XVID")
+            writer = partial(cv2.VideoWriter, os.path.join(output_dir, "output.avi"), self.fourcc, tick_rate, (640, 480))
+        else:
+            raise ValueError(f"Unknown record_mode {record_mode!r}, expected 'stream' or 'legacy'")
+        audio_options = dict(audio_options or {}, stream=audio_stream, codec=audio_codec, clock=self.media_clock)
+        # Opening the camera, the microphone and the encoder each take from tens of ms to a second,
+        # so they open in the background while pygame starts and the images load, and are collected at the end
+        self.live = live
+        if live:
+            startup = ThreadPoolExecutor(max_workers=2, thread_name_prefix="startup")
+            camera_future = startup.submit(ProcessCameraCapture if pipeline == "processes" else CameraCapture, camera)
+            recording_future = startup.submit(self.open_recording, writer, audio_options)
+
+        # Only the modules the game uses, pygame.init would also open the mixer on the sound card the microphone is on
+        pygame.display.init()
+        pygame.font.init()
         self.screen = pygame.display.set_mode((640, 480))
         pygame.display.set_caption("Jumping Game with Camera Background")
         self.clock = pygame.time.Clock()
@@ -20,61 +103,112 @@ class Game:
         self.show_congratulations = False
         self.show_game_over = False
         self.message_start_time = 0
-        self.message_duration = 3  # seconds
+        self.message_duration = message_duration  # seconds
+        self.countdown_seconds = countdown_seconds
+        self.fps = fps
+        self.tick_rate = tick_rate
+        self.max_ticks_per_frame = 5
+        self.current_volume = 0
+        self.output_dir = output_dir
+        self.frame_count = 0
+        self.loop_seconds = 0  # Time spent in the game loop itself, without startup and shutdown
+        self.timer = FrameTimer()
+        # The budget is a tick, not a render frame: a frame over 1000 / fps only lowers the render fps towards tick_rate,
+        # the simulation and the recording keep up until a frame takes longer than a tick
+        self.governor = QualityGovernor(1000 / tick_rate, high=1) if adaptive_quality and fps else None
+        self.quality = self.governor.settings if self.governor is not None else QUALITY_LEVELS[0]
+        self.show_timings = show_timings
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+        self.overlays = []  # The overlay_text calls of the current frame, for the replay trace
+        self.alpha = 1      # The interpolation alpha of the current frame
+        self.tick_count = 0
         self.score = 0
         self.lives = 3
+        self.text_cache = TextCache()
 
-        # Load and resize the platform image
-        self.platform_image = pygame.image.load("Model/ground.png").convert_alpha()
-        self.platform_image = pygame.transform.scale(self.platform_image, (200, 50))  # Resize to (width, height)
+        # Load and resize the images, each file is decoded once and shared (see Assets.py)
+        self.assets = assets
+        self.platform_image = assets.get("Model/ground.png", (200, 50))
         self.player = pygame.sprite.GroupSingle(Player())
 
         ## Pipe Image
-        self.pipe_image = pygame.image.load("Model/pipe.gif").convert_alpha()
-        self.pipe_image = pygame.transform.scale(self.pipe_image, (120, 400))
+        self.pipe_image = assets.get("Model/Pipe.gif", (120, 400))
 
         ## Ocean image  
-        self.ocean = pygame.image.load("Model/ocean-1.png").convert_alpha()
-        self.ocean = pygame.transform.scale(self.ocean, (640, 480))
-        self.ocean_rect = self.ocean.get_rect(topleft=(0, 165))
+        ## Only its visible part, the transparent top of the image would cost a blend per pixel for nothing
+        self.ocean, (ocean_x, ocean_y) = assets.get_trimmed("Model/ocean-1.png", (640, 480))
+        self.ocean_rect = self.ocean.get_rect(topleft=(0 + ocean_x, 165 + ocean_y))
+        self.ocean_opaque = binary_alpha(self.ocean)  # Used when the governor turns the ocean blending off
 
         ## Castle Image
-        self.castle_image = pygame.image.load("Model/Castle.png").convert_alpha()
-        self.castle_image = pygame.transform.scale(self.castle_image, (100, 100))
-
-        ## Video Recorder
-        self.video_cap = cv2.VideoCapture(0)
-        self.fourcc = cv2.VideoWriter_fourcc(*"XVID")
-        self.out = cv2.VideoWriter("output/output.avi", self.fourcc, 15, (640, 480))
-        self.audio_recorder = AudioRecorder()
-        
-        ## Bottom Limit for the Platforms is aroudn 400 since we have Wave that will block the view of the platforms
-        self.platform_layouts = [
-            {
-                "platforms": [(100, 350), (400, 300), (700, 250), (1000, 300), (1300, 250), (1700, 175), (1900, 300), (2220, 350)],
-                "blocks": [(450, 300), (780, 250), (1010, 300)]  # Example block positions
-            }
-        ]
-
-        self.platforms = []
-        self.pipes = []
-        for layout in self.platform_layouts:
-            for pos in layout["platforms"]:
-                platform_rect = self.platform_image.get_rect(topleft=pos)
-                self.platforms.append(platform_rect)
-                pipe_rect = self.pipe_image.get_rect(midtop=(pos[0] + platform_rect.width // 2, pos[1] + platform_rect.height))
-                self.pipes.append(pipe_rect)
-
-        self.blocks = pygame.sprite.Group()
-        for layout in self.platform_layouts:
-            for pos in layout["blocks"]:
-                self.blocks.add(Block(pos[0], pos[1]))
-
-        # Place the castle at the end of the last platform
-        last_platform = self.platforms[-1]
-        self.castle_rect = self.castle_image.get_rect(midbottom=(last_platform.left + last_platform.width // 2, last_platform.top + 5))
+        self.castle_image = assets.get("Model/Castle.png", (100, 100))
+
+        self.camera_surface = CameraSurface((640, 480))
+
+        ## The level is read from its file chunk by chunk as the camera gets to it (see Level.py)
+        ## The endless level is generated from the seeded rng as it scrolls in, and has no castle
+        self.level_file = level
+        self.endless = level == ENDLESS
+        if self.endless:
+            level_chunks = endless_chunks(self.rng)
+            self.castle_rect = None
+        else:
+            level_header, level_chunks = open_level(level)
+            self.castle_rect = self.castle_image.get_rect(midbottom=level_header["castle"])
         self.platform_speed = 5
 
+        ## The level stays in world coordinates, only the camera scrolls
+        self.camera = Camera(640, 480)
+        self.world = World([], [], [], self.castle_rect)
+        self.level = LevelStreamer(self.world, level_chunks, self.platform_image.get_size(), self.pipe_image.get_size(),
+                                   lookahead=self.camera.width)
+        self.level.update(self.camera.viewport)
+        self.level_compositor = LevelCompositor(self.world, self.platform_image, self.pipe_image, self.castle_image,
+                                                tile_width=self.camera.width, height=self.camera.height)
+        self.previous_player_pos = self.player.sprite.rect.topleft
+
+        self.trace = None
+        self.camera_recorder = None
+        self.camera_frame = None  # The camera frame behind the current composite, recorded with the trace
+        if live:
+            self.video_cap = camera_future.result()
+            self.out, self.encoder, self.audio_recorder = recording_future.result()
+            startup.shutdown()
+            if trace:
+                self.trace = TraceWriter(output_dir, self.seed, tick_rate, os.path.basename(self.audio_path), level)
+                camera_writer = cv2.VideoWriter(os.path.join(output_dir, CAMERA_FILE), cv2.VideoWriter_fourcc(*"MJPG"),
+                                                tick_rate, (640, 480))
+                self.camera_recorder = VideoEncoder(camera_writer, max_queue=30, policy="drop_oldest", clock=self.media_clock)
+                self.black_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        # Milliseconds, see report_startup
+        self.startup_times = {"imports": (init_start - STARTED) * 1000, "init": (time.perf_counter() - init_start) * 1000}
+
+    def open_recording(self, writer, audio_options):
+        """
+        Creates the video writer, the encoder and the audio recorder (which opens the microphone), in that order since
+        the recorder streams into the writer. Runs in a startup thread, see __init__.
+        Returns (out, encoder, audio_recorder), out is None when the writer lives in the encoder worker process.
+        """
+        if self.pipeline == "processes":
+            encoder = ProcessVideoEncoder(writer, max_queue=30, policy="drop_oldest", clock=self.media_clock,
+                                          audio=self.record_mode == "stream")
+            audio_recorder = ProcessAudioRecorder(self.audio_path, rate=44100, sink=encoder.audio_queue, **audio_options)
+            return None, encoder, audio_recorder
+        out = writer()
+        encoder = VideoEncoder(out, max_queue=30, policy="drop_oldest", clock=self.media_clock)
+        sink = out.write_audio if self.record_mode == "stream" else None
+        audio_recorder = AudioRecorder(self.audio_path, rate=44100, sink=sink, **audio_options)
+        return out, encoder, audio_recorder
+
+    def report_startup(self):
+        """
+        Prints where the startup time went: importing the modules (only meaningful for the first game of the process),
+        Game.__init__, run until the first frame is on screen, and the total time to first frame since Ambario was imported.
+        """
+        times = {stage: round(ms, 1) for stage, ms in self.startup_times.items()}
+        print("Startup (ms):", times)
+
     def detect_scream(self, volume, threshold=500):
         """
         This method will detect the scream based on the volume of the audio. The scream will be detected if the volume is above the threshold.
@@ -86,185 +220,345 @@ class Game:
 
     def overlay_text(self, text, size, color, position):
         """Overlay text on the screen."""
-        font = pygame.font.Font(None, size)
-        text_surface = font.render(text, True, color)
-        text_rect = text_surface.get_rect(center=position)
-        self.screen.blit(text_surface, text_rect)
+        self.text_cache.draw(self.screen, text, size, color, position)
+        self.overlays.append([text, size, color, position])
 
     def update_hud(self, volume = 0):
         """Update the HUD with the current volume, score, and lives."""
-        font = pygame.font.Font(None, 36)
-        volume_text = font.render(f"Volume: {int(volume)}", True, (255, 255, 255))
-        score_text = font.render(f"Score: {self.score}", True, (255, 255, 255))
-        lives_text = font.render(f"Lives: {self.lives}", True, (255, 255, 255))
-
-        self.screen.blit(volume_text, (10, 10))
-        self.screen.blit(score_text, (10, 50))
-        self.screen.blit(lives_text, (10, 90))
+        self.text_cache.draw_label(self.screen, "Volume: ", volume, 36, (255, 255, 255), (10, 10))
+        self.text_cache.draw_label(self.screen, "Score: ", self.score, 36, (255, 255, 255), (10, 50))
+        self.text_cache.draw_label(self.screen, "Lives: ", self.lives, 36, (255, 255, 255), (10, 90))
 
  
-    def run(self):
+    def step(self, volume=None):
+        """
+        One fixed simulation tick of 1 / tick_rate seconds: scream detection, physics, scrolling, collisions and the score.
+        The game logic only ever advances here, so it runs at the same speed whatever the render, capture or encode rate.
+        Its only input is the volume, so the same volumes (see InputTrace.py) always give the same game.
+        volume: float, default=None - The volume of this tick, None reads the microphone.
+        """
+        player = self.player.sprite
+        self.previous_player_pos = player.rect.topleft
+        self.camera.begin_step()
+
+        self.current_volume = self.audio_recorder.volume if volume is None else volume
+        if self.trace is not None:
+            self.trace.tick(self.current_volume)
+        jump_force = self.detect_scream(self.current_volume)
+        if jump_force:
+            player.jump(jump_force)
+
+        self.tick_count += 1
+        self.player.update(1 / self.tick_rate)
+        # The player walks 1 px per tick faster than the camera scrolls, in a long level it would leave the screen.
+        # Held at 3/4 of the screen, where the castle run of level1 ends at the latest (476 px), so level1 never hits it
+        player.rect.right = min(player.rect.right, self.camera.width * 3 // 4)
+        self.camera.scroll(self.platform_speed)
+        # draw_world interpolates the camera back to the previous tick, a chunk is only released once that view has left it too
+        self.level.update(self.camera.swept_viewport)
+        for block in self.world.visible_blocks(self.camera.viewport):
+            block.update()
+        self.timer.mark("physics")
+
+        # Collisions are resolved in world coordinates, the player itself lives in screen coordinates
+        player_rect = player.rect
+        world_rect = self.camera.to_world(player_rect)
+        player.on_ground = False
+        # Query a margin of one player size around the player, resolving a collision can push it that far
+        for platform in self.world.platforms_near(world_rect.inflate(world_rect.width * 2, world_rect.height * 2)):
+            if world_rect.colliderect(platform):
+                if world_rect.bottom > platform.top and world_rect.top < platform.top:
+                    world_rect.bottom = platform.top
+                    player.on_ground = True
+                    player.gravity = 0
+                elif world_rect.top < platform.bottom and world_rect.bottom > platform.bottom:
+                    world_rect.top = platform.bottom
+                elif world_rect.right > platform.left and world_rect.left < platform.left:
+                    world_rect.right = platform.left
+                elif world_rect.left < platform.right and world_rect.right > platform.right:
+                    world_rect.left = platform.right
+        player_rect.topleft = self.camera.to_screen(world_rect).topleft
+
+        # Check collision with blocks
+        for block in self.world.blocks_near(world_rect):
+            if world_rect.colliderect(block.rect):
+                print("Collision with block!")
+                if not player.invincible:
+                    player.hit()
+                    self.lives -= 1
+                    if self.lives <= 0:
+                        player.die()
+                        self.show_game_over = True
+                        self.message_start_time = time.time()
+                        self.running = False
+
+        # Check if player falls off the screen
+        if player_rect.top > self.screen.get_height():
+            print("Player fell off the screen!")
+            player.die()
+            self.lives -= 1
+            self.show_game_over = True
+            self.message_start_time = time.time()
+            self.running = False
+
+        # Check collision with castle
+        if self.castle_rect is not None and world_rect.colliderect(self.castle_rect):
+            print("Congratulations! You've reached the castle!")
+            self.show_congratulations = True
+            self.message_start_time = time.time()
+            self.running = False
+
+        # Update the score based on distance traveled
+        self.score += 1
+        self.timer.mark("collide")
+
+    def draw_world(self, alpha):
+        """
+        Draws the player and the level, interpolated between the last two simulation ticks.
+        alpha: float - How far the render time is between the previous tick (0) and the current one (1).
+        """
+        offset = self.camera.interpolated_x(alpha)
+        viewport = pygame.Rect(offset, 0, self.camera.width, self.camera.height)
+
+        player = self.player.sprite
+        previous_x, previous_y = self.previous_player_pos
+        self.screen.blit(player.image, (round(previous_x + (player.rect.x - previous_x) * alpha),
+                                        round(previous_y + (player.rect.y - previous_y) * alpha)))
+        # The platforms, pipes and castle come pre-rendered in strip tiles, only the animated blocks are drawn one by one
+        self.level_compositor.draw(self.screen, offset, self.camera.width)
+        for block in self.world.visible_blocks(viewport):
+            self.screen.blit(block.image, block.rect.move(-offset, 0))
+
+        # Draw the ocean
+        self.screen.blit(self.ocean if self.quality["ocean_alpha"] else self.ocean_opaque, self.ocean_rect)
+        self.timer.mark("draw")
+
+    def present(self):
+        """Shows the finished frame on the display."""
+        pygame.display.update()
+
+    def record(self):
+        """
+        Queues the screen for the recording. The video stays at tick_rate whatever the render rate: the encoder puts the frame
+        in the slot of its timestamp on the media clock, repeating it over slots the game was too slow to fill.
+        Unthrottled (fps=None) every frame is recorded once, the video then plays faster than the session.
+        At lower quality only every record_interval-th slot is submitted, the encoder repeats the frame over the others.
+        """
+        if self.fps is None:
+            slot, timestamp = self.encoder.frames_submitted, None
+        else:
+            timestamp = time.perf_counter()
+            slot = self.media_clock.frame_index(timestamp)
+            if slot % self.quality["record_interval"]:
+                return
+        if self.encoder.submit(self.screen, timestamp=timestamp) and self.trace is not None:
+            camera = self.camera_frame is not None
+            # A black frame when there is no camera keeps the camera stream in step with the slots
+            self.camera_recorder.submit_frame(self.camera_frame if camera else self.black_frame, timestamp=timestamp)
+            self.trace.frame(slot, self.alpha, camera, self.overlays)
+
+    def state(self):
+        """The simulation state, a replay of the session must end with the same one."""
+        player = self.player.sprite
+        return {"ticks": self.tick_count, "score": self.score, "lives": self.lives,
+                "camera_x": self.camera.x, "player": [player.rect.x, player.rect.y, player.gravity, player.invincible]}
+
+    def run(self, max_frames=None):
         """
         Important method to run the game. This method will handle the game loop, the player, the platforms, and the game logic. 
         The way we can draw the pygame screen is by using the cv2 to capture the frame from the camera and then convert it to the pygame surface.
         The game loop will run until the game is over. The game is over when the player reaches the castle or when the player falls off the screen.
+        The simulation runs in fixed ticks (see step) fed by an accumulator of real time, and every rendered frame interpolates between
+        the last two ticks. A slow frame means more ticks in the next one, not a slower game.
+        max_frames: int, default=None - Stop after this many rendered frames, for benchmarks.
         """
+        run_start = time.perf_counter()
+        self.media_clock.start()
         self.audio_recorder.start()
-        countdown_seconds = 3
+        self.video_cap.start()
+        self.encoder.start()
+        if self.camera_recorder is not None:
+            self.camera_recorder.start()
+        countdown_seconds = self.countdown_seconds
         countdown_start_time = time.time()
-        current_volume = 0  # Initialize current_volume
+        loop_start_time = time.perf_counter()
+        tick_length = 1 / self.tick_rate
+        accumulator = 0
+        previous_time = None
 
         while self.running:
+            self.timer.start_frame()
             current_time = time.time()
             elapsed_time = current_time - countdown_start_time
+            self.overlays = []
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     self.running = False
+                    if self.trace is not None:
+                        self.trace.event("quit")
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    self.show_timings = not self.show_timings
 
+            # Never wait on the camera, if it stalls we keep the last frame (or a black screen) and the game keeps ticking
             ret, frame = self.video_cap.read()
-            if ret:
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                frame = np.rot90(frame)
-                self.screen.fill([0, 0, 0])
-                frame_surface = pygame.surfarray.make_surface(frame)
-                self.screen.blit(frame_surface, (0, 0))
-
-                if elapsed_time < countdown_seconds:
-                    self.overlay_text(str(countdown_seconds - int(elapsed_time)), 74, (255, 255, 255), (320, 240))
+            self.camera_frame = frame if ret else None
+            self.timer.mark("capture")
+
+            playing = elapsed_time >= countdown_seconds
+            alpha = 1
+            if playing:
+                if self.fps is None:
+                    ticks = 1  # Unthrottled: one tick per frame, as fast as the machine goes
                 else:
-                    current_volume = self.audio_recorder.volume
-                    jump_force = self.detect_scream(current_volume)
-                    if jump_force:
-                        self.player.sprite.jump(jump_force)
-
-                    self.player.update()
-                    self.blocks.update()
-
-                    for platform in self.platforms:
-                        platform.x -= self.platform_speed
-
-                    for pipe in self.pipes:
-                        pipe.x -= self.platform_speed
-
-                    for block in self.blocks:
-                        block.rect.x -= self.platform_speed
-
-                    self.castle_rect.x -= self.platform_speed
-
-                    player_rect = self.player.sprite.rect
-                    self.player.sprite.on_ground = False
-                    for platform in self.platforms:
-                        if player_rect.colliderect(platform):
-                            if player_rect.bottom > platform.top and player_rect.top < platform.top:
-                                player_rect.bottom = platform.top
-                                self.player.sprite.on_ground = True
-                                self.player.sprite.gravity = 0
-                            elif player_rect.top < platform.bottom and player_rect.bottom > platform.bottom:
-                                player_rect.top = platform.bottom
-                            elif player_rect.right > platform.left and player_rect.left < platform.left:
-                                player_rect.right = platform.left
-                            elif player_rect.left < platform.right and player_rect.right > platform.right:
-                                player_rect.left = platform.right
-
-                    # Check collision with blocks
-                    for block in self.blocks:
-                        if player_rect.colliderect(block.rect):
-                            print("Collision with block!")
-                            if not self.player.sprite.invincible:
-                                self.player.sprite.hit()
-                                self.lives -= 1
-                                if self.lives <= 0:
-                                    self.player.sprite.die()
-                                    self.show_game_over = True
-                                    self.message_start_time = time.time()
-                                    self.running = False
-
-                    # Check if player falls off the screen
-                    if player_rect.top > self.screen.get_height():
-                        print("Player fell off the screen!")
-                        self.player.sprite.die()
-                        self.lives -= 1
-                        self.show_game_over = True
-                        self.message_start_time = time.time()
-                        self.running = False
-
-                    self.player.draw(self.screen)
-                    for platform in self.platforms:
-                        self.screen.blit(self.platform_image, platform)
-                    for pipe in self.pipes:
-                        self.screen.blit(self.pipe_image, pipe)
-                    self.blocks.draw(self.screen)
-
-                    # Draw the castle
-                    self.screen.blit(self.castle_image, self.castle_rect)
-
-                    # Draw the ocean
-                    self.screen.blit(self.ocean, self.ocean_rect)
-
-                    # Check collision with castle
-                    if player_rect.colliderect(self.castle_rect):
-                        print("Congratulations! You've reached the castle!")
-                        self.show_congratulations = True
-                        self.message_start_time = time.time()
-                        self.running = False
-
-                    # Update the score based on distance traveled
-                    self.score += 1
-
-                if self.show_congratulations:
-                    self.overlay_text("Congratulations!", 74, (255, 255, 255), (320, 240))
-                    if (current_time - self.message_start_time) > self.message_duration:
-                        self.show_congratulations = False
-
-                if self.show_game_over:
-                    self.overlay_text("Game Over", 74, (255, 0, 0), (320, 240))
-                    if (current_time - self.message_start_time) > self.message_duration:
-                        self.show_game_over = False
-
-                # Update the HUD
-                self.update_hud(current_volume)
+                    now = time.perf_counter()
+                    accumulator += tick_length if previous_time is None else now - previous_time
+                    previous_time = now
+                    ticks = int(accumulator / tick_length)
+                    accumulator -= ticks * tick_length
+                    if ticks > self.max_ticks_per_frame:
+                        # Too far behind to catch up, drop the time instead of spiralling
+                        ticks = self.max_ticks_per_frame
+                        accumulator = 0
+                    alpha = accumulator / tick_length
+                for _ in range(ticks):
+                    self.step()
+                    if not self.running:
+                        alpha = 1
+                        break
+            self.alpha = alpha
+
+            if ret and self.frame_count % self.quality["camera_interval"] == 0:
+                self.screen.blit(self.camera_surface.update(frame), (0, 0))
+            elif ret:
+                self.screen.blit(self.camera_surface.surface, (0, 0))  # Keep the last background, the governor skips updates
+            else:
+                self.screen.fill([0, 0, 0])
+            self.timer.mark("camera")
 
-                pygame.display.update()
+            if not playing:
+                self.overlay_text(str(countdown_seconds - int(elapsed_time)), 74, (255, 255, 255), (320, 240))
+                self.assets.convert_ready()
+            else:
+                self.draw_world(alpha)
 
-                frame_for_video = np.array(pygame.surfarray.pixels3d(self.screen))
-                frame_for_video = np.transpose(frame_for_video, (1, 0, 2))
-                frame_for_video = cv2.cvtColor(frame_for_video, cv2.COLOR_RGB2BGR)
-                self.out.write(frame_for_video)
+            if self.show_congratulations:
+                self.overlay_text("Congratulations!", 74, (255, 255, 255), (320, 240))
+                if (current_time - self.message_start_time) > self.message_duration:
+                    self.show_congratulations = False
 
-                self.clock.tick(15)
+            if self.show_game_over:
+                self.overlay_text("Game Over", 74, (255, 0, 0), (320, 240))
+                if (current_time - self.message_start_time) > self.message_duration:
+                    self.show_game_over = False
+
+            # Update the HUD
+            self.update_hud(self.current_volume)
+            if self.show_timings:
+                self.timer.draw(self.screen, self.text_cache)
+            self.timer.mark("hud")
+
+            self.present()
+            self.timer.mark("display")
+            if self.frame_count == 0:
+                now = time.perf_counter()
+                self.startup_times["first_frame"] = (now - run_start) * 1000
+                self.startup_times["time_to_first_frame"] = (now - STARTED) * 1000
+
+            self.record()
+            self.timer.mark("record")
+
+            if self.governor is not None and self.governor.observe(self.timer.frame_ms()):
+                self.quality = self.governor.settings
+            self.frame_count += 1
+            if max_frames is not None and self.frame_count >= max_frames:
+                self.running = False
+            self.clock.tick(self.fps or 0)
+            self.timer.mark("wait")
+
+        self.loop_seconds = time.perf_counter() - loop_start_time
 
         # Ensure the final message is displayed for the specified duration
         end_time = time.time()
         while (time.time() - end_time) < self.message_duration:
+            self.overlays = []
             if self.show_congratulations:
                 self.overlay_text("Congratulations!", 74, (255, 255, 255), (320, 240))
             if self.show_game_over:
                 self.overlay_text("Game Over", 74, (255, 0, 0), (320, 240))
-            pygame.display.update()
-            frame_for_video = np.array(pygame.surfarray.pixels3d(self.screen))
-            frame_for_video = np.transpose(frame_for_video, (1, 0, 2))
-            frame_for_video = cv2.cvtColor(frame_for_video, cv2.COLOR_RGB2BGR)
-            self.out.write(frame_for_video)
-            self.clock.tick(15)
+            self.present()
+            self.record()
+            self.clock.tick(self.tick_rate)
 
         self.audio_recorder.stop()
         self.audio_recorder.save()
+        if self.record_mode == "stream":
+            # The writer lives in the encoder worker with the processes pipeline
+            writer = self.encoder if self.pipeline == "processes" else self.out
+            writer.close_audio()
         self.video_cap.release()
-        self.out.release()
-
-        # Combine audio and video
-        combine_audio_video("output/output.avi", "output/output.wav", "output/final_output.avi")
+        self.encoder.stop()
+        if self.trace is not None:
+            self.camera_recorder.stop()
+            self.trace.close(self.state())
+            print("Replay trace:", self.trace.ticks, "ticks, final state", self.state())
+        print("Camera stats:", self.video_cap.stats())
+        print("Encoder stats:", self.encoder.stats())
+        print("Audio latency (ms):", self.audio_recorder.latency_stats())
+        print("Text cache stats:", self.text_cache.stats())
+        self.report_startup()
+        if self.governor is not None:
+            print(f"Quality: {len(self.governor.transitions)} transition(s), ended at {self.quality['name']!r}")
+        self.timer.dump(os.path.join(self.output_dir, "frame_timings.json"))
+        print("Frame timings (ms):")
+        for stage, values in self.timer.percentiles().items():
+            print(f"  {stage:<8} p50 {values['p50']:6.2f}  p95 {values['p95']:6.2f}  p99 {values['p99']:6.2f}")
+        print("Asset load times:")
+        self.assets.report()
+        self.assets.shutdown()
+
+        # Combine audio and video, the streaming mode already muxed them while playing
+        if self.record_mode == "legacy":
+            combine_audio_video(os.path.join(self.output_dir, "output.avi"), self.audio_path,
+                                os.path.join(self.output_dir, "final_output.avi"), mode=self.postprocess,
+                                threads=self.postprocess_threads)
 
         pygame.quit()  
 
-def combine_audio_video(video_path, audio_path, output_path):
-    video = VideoFileClip(video_path)
-    audio = AudioFileClip(audio_path)
-    final_video = video.with_audio(audio)
-    final_video.write_videofile(output_path, codec="libx264", audio_codec="aac")
+## Post-processing modes for combine_audio_video. "remux" keeps the recorded video stream as it is and only encodes the audio.
+POSTPROCESS_PRESETS = {
+    "remux": ["-c:v", "copy", "-c:a", "aac"],
+    "ultrafast": ["-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac"],
+    "veryfast": ["-c:v", "libx264", "-preset", "veryfast", "-c:a", "aac"],
+    "medium": ["-c:v", "libx264", "-preset", "medium", "-c:a", "aac"],
+}
+
+def combine_audio_video(video_path, audio_path, output_path, mode="remux", threads=0):
+    """
+    Combines the recorded video and audio into one file.
+    mode: str, default="remux" - One of POSTPROCESS_PRESETS, or "moviepy" for the old full re-encode through moviepy.
+    threads: int, default=0 - The number of encoder threads for the x264 presets, 0 lets ffmpeg pick one per core.
+    """
+    if mode == "moviepy":
+        from moviepy import VideoFileClip, AudioFileClip  # Slow to import (half a second), only this old path needs it
+        video = VideoFileClip(video_path)
+        audio = AudioFileClip(audio_path)
+        final_video = video.with_audio(audio)
+        final_video.write_videofile(output_path, codec="libx264", audio_codec="aac")
+        return
+    if mode not in POSTPROCESS_PRESETS:
+        raise ValueError(f"Unknown post-processing mode {mode!r}, expected 'moviepy' or one of {list(POSTPROCESS_PRESETS)}")
+
+    command = [
+        imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error",
+        "-i", video_path, "-i", audio_path,
+        "-map", "0:v:0", "-map", "1:a:0",
+        *POSTPROCESS_PRESETS[mode], "-threads", str(threads),
+        output_path,
+    ]
+    subprocess.run(command, check=True)
 
 if __name__ == "__main__":
-    game = Game()
+    game = Game(level=sys.argv[1] if len(sys.argv) > 1 else LEVEL_FILE)  # python Ambario.py [level file | endless]
     game.run()
     
@@ -0,0 +1,136 @@
+"""
+Offline build step for the game images. Every (file, size) of GAME_ASSETS is decoded, scaled to the size the game draws it at
+and trimmed to the bounding box of its visible pixels, then all of them are packed into one atlas written to Model/assets.pack.
+Loading the pack is one file read and one zlib inflate instead of decoding and scaling every PNG and GIF at startup.
+Each sprite records how its alpha is used, so the loader (see AssetManager) picks the cheapest way to blit it:
+- "opaque": no transparent pixel, a plain copy,
+- "binary": only fully transparent or fully opaque pixels, the transparent ones are stored as the colorkey,
+- "alpha": blended edges, per-pixel alpha.
+Rebuild the pack after changing an image or GAME_ASSETS, --check tells if it is out of date.
+
+Usage: python AssetPack.py [--check]
+"""
+import hashlib
+import json
+import os
+import struct
+import sys
+import zlib
+
+import pygame
+
+ASSET_PACK = os.path.join("Model", "assets.pack")
+MAGIC = b"AMBPACK1"
+ATLAS_WIDTH = 1024
+COLORKEY = (255, 0, 255)
+
+def entry_key(path, size):
+    """The name of a (file, size) in the pack."""
+    return path if size is None else f"{path}@{size[0]}x{size[1]}"
+
+def source_hash(path):
+    with open(path, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+def classify(surface):
+    """Returns "opaque", "binary" or "alpha" for a per-pixel alpha surface."""
+    alpha = pygame.surfarray.array_alpha(surface)
+    if (alpha == 255).all():
+        return "opaque"
+    if ((alpha == 0) | (alpha == 255)).all():
+        return "binary"
+    return "alpha"
+
+def shelf_pack(sizes, width):
+    """
+    Places rectangles of the given (width, height) on shelves, tallest first, each shelf as high as its first rectangle.
+    Returns the (x, y) of each rectangle in the input order and the total height.
+    """
+    positions = [None] * len(sizes)
+    x = y = shelf_height = 0
+    for index in sorted(range(len(sizes)), key=lambda index: -sizes[index][1]):
+        w, h = sizes[index]
+        if x + w > width:
+            x, y, shelf_height = 0, y + shelf_height, 0
+        positions[index] = (x, y)
+        x += w
+        shelf_height = max(shelf_height, h)
+    return positions, y + shelf_height
+
+def build_pack(specs, path=ASSET_PACK):
+    """
+    Builds the pack for specs, an iterable of (file, size), and writes it to path. Needs a display mode for convert_alpha.
+    Returns the header written.
+    """
+    sprites = []
+    for source, size in specs:
+        surface = pygame.image.load(source).convert_alpha()
+        if size is not None:
+            surface = pygame.transform.scale(surface, size)
+        trim = surface.get_bounding_rect()
+        sprite = surface.subsurface(trim).copy()
+        kind = classify(sprite)
+        if kind == "binary":
+            pixels = pygame.surfarray.pixels3d(sprite)
+            alpha = pygame.surfarray.pixels_alpha(sprite)
+            if (pixels[alpha == 255] == COLORKEY).all(axis=1).any():
+                kind = "alpha"  # The colorkey is a real color of this sprite, keep the alpha channel
+            else:
+                pixels[alpha == 0] = COLORKEY
+            del pixels, alpha
+        sprites.append((source, size, surface.get_size(), trim, sprite, kind))
+
+    positions, height = shelf_pack([sprite[4].get_size() for sprite in sprites], ATLAS_WIDTH)
+    atlas = pygame.Surface((ATLAS_WIDTH, max(height, 1)), pygame.SRCALPHA, 32)
+    atlas.fill((0, 0, 0, 0))
+    entries = {}
+    for (source, size, full_size, trim, sprite, kind), position in zip(sprites, positions):
+        atlas.blit(sprite, position, special_flags=pygame.BLEND_RGBA_MAX)  # A copy, nothing to blend with on the cleared atlas
+        entries[entry_key(source, size)] = {"rect": [*position, *sprite.get_size()], "size": list(full_size),
+                                            "offset": [trim.x, trim.y], "kind": kind, "sha1": source_hash(source)}
+
+    header = {"atlas": list(atlas.get_size()), "colorkey": list(COLORKEY), "entries": entries}
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    with open(path, "wb") as file:
+        file.write(MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+        file.write(zlib.compress(pygame.image.tobytes(atlas, "RGBA"), 9))
+    return header
+
+def read_pack(path=ASSET_PACK):
+    """
+    Reads a pack written by build_pack. Doesn't need the display, so it can run in a background thread.
+    Returns (header, atlas) with the atlas as an unconverted RGBA Surface.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not an asset pack")
+    header_end = len(MAGIC) + 4 + struct.unpack_from("<I", data, len(MAGIC))[0]
+    header = json.loads(data[len(MAGIC) + 4:header_end])
+    atlas = pygame.image.frombuffer(zlib.decompress(data[header_end:]), tuple(header["atlas"]), "RGBA")
+    return header, atlas
+
+def stale_entries(specs, path=ASSET_PACK):
+    """Returns the (file, size) of specs that are missing from the pack or whose file changed since it was built."""
+    if not os.path.exists(path):
+        return list(specs)
+    entries = read_pack(path)[0]["entries"]
+    return [(source, size) for source, size in specs
+            if entry_key(source, size) not in entries or entries[entry_key(source, size)]["sha1"] != source_hash(source)]
+
+if __name__ == "__main__":
+    from Assets import GAME_ASSETS
+
+    if "--check" in sys.argv[1:]:
+        stale = stale_entries(GAME_ASSETS)
+        for source, size in stale:
+            print("Out of date:", entry_key(source, size))
+        sys.exit(1 if stale else 0)
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    header = build_pack(GAME_ASSETS)
+    for key, entry in header["entries"].items():
+        print(f"  {key:<40} {entry['size'][0]:>4}x{entry['size'][1]:<4} -> {entry['rect'][2]:>4}x{entry['rect'][3]:<4} {entry['kind']}")
+    print(f"Wrote {ASSET_PACK}: atlas {header['atlas'][0]}x{header['atlas'][1]}, {os.path.getsize(ASSET_PACK)} bytes")
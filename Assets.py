@@ -0,0 +1,206 @@
+import os
+import pygame
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from AssetPack import ASSET_PACK, COLORKEY, entry_key, read_pack
+
+## Every image the game uses with the size it is drawn at (None keeps the file size),
+## so they can all be decoded in the background while the game starts
+GAME_ASSETS = (
+    ("Model/ground.png", (200, 50)),
+    ("Model/Pipe.gif", (120, 400)),
+    ("Model/ocean-1.png", (640, 480)),
+    ("Model/Castle.png", (100, 100)),
+    ("Model/piranha_frame_1.png", None),
+    ("Model/piranha_frame_2.png", None),
+    ("Model/Mario - Walk1.gif", None),
+    ("Model/Mario - Walk2.gif", None),
+    ("Model/Mario - Walk3.gif", None),
+    ("Model/Mario - Jump.gif", None),
+)
+
+def binary_alpha(surface, threshold=128, key=(255, 0, 255)):
+    """
+    Returns an opaque copy of a per-pixel alpha surface where the pixels under the alpha threshold become a colorkey.
+    Blitting it is a copy with a key test instead of a blend, at the price of hard edges.
+    """
+    keyed = surface.convert()
+    alpha = pygame.surfarray.pixels_alpha(surface)
+    pixels = pygame.surfarray.pixels3d(keyed)
+    pixels[alpha < threshold] = key
+    del alpha, pixels  # Unlock both surfaces
+    keyed.set_colorkey(key, pygame.RLEACCEL)
+    return keyed
+
+class AssetManager:
+    """
+    Central image cache. Each file is decoded once, and each (file, size) is converted and scaled once,
+    then the same Surface is shared by every sprite that uses it (100 blocks means 2 decodes, not 200).
+    Decoding can run in background threads (preload), the display conversion always happens on the thread calling get,
+    since convert_alpha needs the display.
+    When the asset pack exists (see AssetPack.py) the images come pre-scaled and trimmed out of its atlas, and only the files
+    missing from it are decoded. Pack images are converted for the cheapest blit their alpha allows and RLE accelerated.
+    workers: int, default=4 - The number of background decode threads.
+    pack: str, default=ASSET_PACK - The asset pack, None to always decode the files.
+    """
+    def __init__(self, workers=4, pack=ASSET_PACK):
+        self.workers = workers
+        self.pack_path = pack
+        self.executor = None
+        self.lock = threading.Lock()
+        self.pack = None      # Future of (header, atlas) once preload found the pack
+        self.decoded = {}     # path -> Future of the decoded (unconverted) Surface
+        self.wanted = []      # (path, size) pairs given to preload, converted by convert_ready
+        self.surfaces = {}    # (path, size, alpha) -> converted Surface, (path, size, "trimmed") -> (Surface, offset)
+        self.load_times = {}  # path -> seconds spent decoding, converting and scaling
+
+    def decode(self, path):
+        start = time.perf_counter()
+        surface = pygame.image.load(path)
+        self.add_time(path, time.perf_counter() - start)
+        return surface
+
+    def add_time(self, path, seconds):
+        with self.lock:
+            self.load_times[path] = self.load_times.get(path, 0) + seconds
+
+    def read_pack(self):
+        start = time.perf_counter()
+        pack = read_pack(self.pack_path)
+        self.add_time(self.pack_path, time.perf_counter() - start)
+        return pack
+
+    def preload(self, specs=GAME_ASSETS):
+        """
+        Starts reading the asset pack, or decoding the files without it, in background threads and returns immediately.
+        specs: iterable of (path, size) - The files and the size they will be asked for.
+        """
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="asset")
+        with self.lock:
+            if self.pack is None and self.pack_path is not None and os.path.exists(self.pack_path):
+                self.pack = self.executor.submit(self.read_pack)
+        for path, size in specs:
+            self.wanted.append((path, size))
+            with self.lock:
+                if self.pack is None and path not in self.decoded:
+                    self.decoded[path] = self.executor.submit(self.decode, path)
+
+    def pack_entry(self, path, size):
+        """Returns (entry, atlas) for a (file, size) in the asset pack, None if there is no pack or it doesn't have it."""
+        if self.pack is None:
+            return None
+        header, atlas = self.pack.result()
+        entry = header["entries"].get(entry_key(path, size))
+        return (entry, atlas) if entry is not None else None
+
+    def from_pack(self, path, entry, atlas):
+        """Cuts a trimmed image out of the atlas and converts it for its kind of alpha (see AssetPack.py)."""
+        start = time.perf_counter()
+        sprite = atlas.subsurface(entry["rect"])
+        if entry["kind"] == "opaque":
+            surface = sprite.convert()
+        elif entry["kind"] == "binary":
+            surface = sprite.convert()
+            surface.set_colorkey(COLORKEY, pygame.RLEACCEL)
+        else:
+            surface = sprite.convert_alpha()
+            surface.set_alpha(255, pygame.RLEACCEL)  # RLE skips the transparent runs of per-pixel alpha too
+        self.add_time(path, time.perf_counter() - start)
+        return surface
+
+    def get_trimmed(self, path, size=None):
+        """
+        Returns (surface, offset): the image cropped to its visible pixels and where that crop starts in the full image.
+        Blitting it at position + offset draws the same as the full image at position, without blending its empty borders.
+        From the pack a per-pixel alpha image is also RLE accelerated, SDL then leaves the destination alpha as it was,
+        so only blit it onto opaque surfaces like the screen. The full images of get have no such restriction.
+        """
+        key = (path, size, "trimmed")
+        trimmed = self.surfaces.get(key)
+        if trimmed is not None:
+            return trimmed
+
+        packed = self.pack_entry(path, size)
+        if packed is not None:
+            entry, atlas = packed
+            trimmed = self.from_pack(path, entry, atlas), tuple(entry["offset"])
+        else:
+            surface = self.get(path, size)
+            bounds = surface.get_bounding_rect()
+            trimmed = surface.subsurface(bounds), bounds.topleft
+        self.surfaces[key] = trimmed
+        return trimmed
+
+    def get(self, path, size=None, alpha=True):
+        """
+        Returns the converted Surface for a file, scaled to size (width, height) if given.
+        Waits for the background decode if the file was preloaded, decodes it right away otherwise.
+        """
+        key = (path, size, alpha)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            return surface
+
+        packed = self.pack_entry(path, size) if alpha else None
+        if packed is not None:
+            # Put the trimmed image back at its place in a full-size surface, the callers position it by its full rect
+            entry, atlas = packed
+            sprite, offset = self.get_trimmed(path, size)
+            if entry["kind"] == "alpha":
+                surface = pygame.Surface(entry["size"], pygame.SRCALPHA).convert_alpha()
+                surface.fill((0, 0, 0, 0))
+                surface.blit(atlas.subsurface(entry["rect"]), offset, special_flags=pygame.BLEND_RGBA_MAX)
+            elif tuple(entry["size"]) == tuple(entry["rect"][2:]):
+                surface = sprite
+            else:
+                surface = pygame.Surface(entry["size"]).convert()
+                surface.fill(COLORKEY)
+                surface.blit(sprite, offset)
+                surface.set_colorkey(COLORKEY, pygame.RLEACCEL)
+            self.surfaces[key] = surface
+            return surface
+
+        with self.lock:
+            future = self.decoded.get(path)
+        image = future.result() if future is not None else self.decode(path)
+
+        start = time.perf_counter()
+        surface = image.convert_alpha() if alpha else image.convert()
+        if size is not None:
+            surface = pygame.transform.scale(surface, size)
+        self.add_time(path, time.perf_counter() - start)
+        self.surfaces[key] = surface
+        return surface
+
+    def convert_ready(self):
+        """
+        Converts the preloaded files that finished decoding and are not converted yet. Cheap enough to call once per frame,
+        e.g. during the countdown, so the first real frame doesn't pay for it.
+        """
+        for path, size in self.wanted:
+            future = self.pack if self.pack is not None else self.decoded[path]
+            if (path, size, True) not in self.surfaces and future.done():
+                self.get(path, size)
+
+    def report(self):
+        """Prints how long each asset took to load."""
+        total = 0
+        for path, seconds in sorted(self.load_times.items(), key=lambda item: -item[1]):
+            print(f"  {path:<32} {seconds * 1000:7.2f} ms")
+            total += seconds
+        print(f"  {'total':<32} {total * 1000:7.2f} ms")
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None  # assets is shared, the next Game in the process preloads through a fresh pool
+            with self.lock:
+                # Loads that were cancelled are submitted again by the next preload
+                if self.pack is not None and self.pack.cancelled():
+                    self.pack = None
+                self.decoded = {path: future for path, future in self.decoded.items() if not future.cancelled()}
+
+## Shared by the game and the sprites
+assets = AssetManager()
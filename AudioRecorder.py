@@ -1,7 +1,10 @@
-import pyaudio
+import queue
 import threading
+import time
+from collections import deque
 import numpy as np
-import wave
+from AudioWriter import WRITERS
+from MediaClock import AudioAligner
 
 class AudioRecorder(threading.Thread):
     """
@@ -9,61 +12,205 @@ class AudioRecorder(threading.Thread):
     filename: str, default="output/output.wav" - The name of the file to save the audio recording.
     rate: int, default=44100 - The sampling rate of the audio.
     frames_per_buffer: int, default=1024 - The number of frames per buffer.
+    sink: callable, default=None - Optional function called with every raw int16 block, e.g. to stream it into an encoder.
+    stream: object, default=None - An already opened input stream (anything with read, stop_stream and close, see Sources.py).
+        None opens the default microphone with PyAudio.
+    codec: str, default="wav" - "wav" or "flac" (compressed through the bundled ffmpeg), see AudioWriter.py.
+    max_buffered_seconds: float, default=6 - The audio waiting for the disk before new blocks are dropped, in seconds.
+    flush_interval: float, default=2 - Seconds between two flushes of the file, the most audio a crash can lose.
+    mode: str, default="callback" - "callback" lets PyAudio push small blocks of hop_size samples as soon as they are captured,
+        "blocking" reads blocks of frames_per_buffer samples (the old behaviour). An injected stream always uses blocking reads,
+        of hop_size samples in callback mode.
+    hop_size: int, default=256 - The samples between two volume estimates (about 6 ms at 44.1 kHz).
+    window_size: int, default=512 - The samples in each RMS window, windows overlap when it is larger than hop_size.
+    clock: MediaClock, default=None - The clock shared with the video. The file and the sink then get the blocks aligned to it
+        by their capture time (see AudioAligner), None writes the blocks back to back as they come.
+
+    The audio is streamed to disk by a writer thread while recording, so memory stays flat however long the session is.
     """
-    def __init__(self, filename="output/output.wav", rate=44100, frames_per_buffer=1048):
+    def __init__(self, filename="output/output.wav", rate=44100, frames_per_buffer=1048, sink=None, stream=None,
+                 codec="wav", max_buffered_seconds=6, flush_interval=2, mode="callback", hop_size=256, window_size=512,
+                 clock=None):
         super(AudioRecorder, self).__init__()
         self.filename = filename
         self.rate = rate
         self.frames_per_buffer = frames_per_buffer
-        self.audio_frames = []
+        self.sink = sink
+        self.codec = codec
+        self.flush_interval = flush_interval
+        if mode not in ("callback", "blocking"):
+            raise ValueError(f"Unknown mode {mode!r}, expected 'callback' or 'blocking'")
+        self.mode = mode
+        self.hop_size = hop_size
+        block_size = hop_size if mode == "callback" else frames_per_buffer
+        self.write_queue = queue.Queue(maxsize=max(1, round(max_buffered_seconds * rate / block_size)))
+        self.writer_thread = threading.Thread(target=self.write_audio, daemon=True)
+        self.blocks_dropped = 0
+        self.clock = clock
+        self.sink_aligner = AudioAligner(clock) if clock is not None and sink is not None else None
+        self.file_aligner = None  # Created by the writer thread
+        self.window_size = window_size
+        self.tail = np.zeros(0, dtype=np.int16)  # Samples of the next window that started in the previous block
         self.volume = 0
+        self.level = (0, time.perf_counter())  # (volume, perf_counter time it was published), replaced in one assignment
+        self.latencies = deque(maxlen=1000)    # Seconds from the capture of a block's first sample to its volume being published
         self.running = False
+        self.stopped = threading.Event()
 
-        self.p = pyaudio.PyAudio()
-        self.stream = self.p.open(format=pyaudio.paInt16,
-                                  channels=1,
-                                  rate=self.rate,
-                                  input=True,
-                                  frames_per_buffer=self.frames_per_buffer)
+        if stream is not None:
+            self.p = None
+            self.stream = stream
+            self.pushes_blocks = False  # An injected stream is read, see run
+        else:
+            import pyaudio  # Only needed for a real microphone
+            self.p = pyaudio.PyAudio()
+            self.pa_continue, self.pa_complete = pyaudio.paContinue, pyaudio.paComplete  # Return codes of self.callback
+            self.pushes_blocks = mode == "callback"  # PyAudio calls self.callback with every block
+            if mode == "callback":
+                self.stream = self.p.open(format=pyaudio.paInt16,
+                                          channels=1,
+                                          rate=self.rate,
+                                          input=True,
+                                          frames_per_buffer=self.hop_size,
+                                          stream_callback=self.callback,
+                                          start=False)
+            else:
+                self.stream = self.p.open(format=pyaudio.paInt16,
+                                          channels=1,
+                                          rate=self.rate,
+                                          input=True,
+                                          frames_per_buffer=self.frames_per_buffer)
 
     def run(self):
         """
-        Background thread to record audio. in this steps we do the calculation of the volume of the audio.
-        using the formula: volume = np.linalg.norm(audio_data) / np.sqrt(len(audio_data))
-        which is the RMS value of the audio data. 
+        Background thread to record audio. In callback mode PyAudio calls self.callback from its own thread and this one only waits,
+        otherwise it reads the blocks itself. Each block goes through self.process.
         """
         self.running = True
-        while self.running:
-            try:
-                data = self.stream.read(self.frames_per_buffer, exception_on_overflow=False)
-                self.audio_frames.append(data)
+        self.writer_thread.start()
+        if self.pushes_blocks:
+            self.stream.start_stream()
+            self.stopped.wait()
+        else:
+            block_size = self.hop_size if self.mode == "callback" else self.frames_per_buffer
+            while self.running:
+                try:
+                    data = self.stream.read(block_size, exception_on_overflow=False)
+                    # A blocking read returns once the block is full, so its first sample arrived one block ago
+                    self.process(data, time.perf_counter() - block_size / self.rate)
+                except Exception as e:
+                    print("Audio recording error:", e)
+        self.write_queue.put(None)
+
+    def callback(self, in_data, frame_count, time_info, status):
+        """
+        PyAudio stream callback. time_info gives the capture (ADC) time of the first sample on the stream clock,
+        which is converted to perf_counter time with the stream's current time.
+        """
+        now = time.perf_counter()
+        adc_time = time_info.get("input_buffer_adc_time", 0)
+        if adc_time > 0:
+            captured_at = now - (time_info["current_time"] - adc_time)
+        else:
+            captured_at = now - frame_count / self.rate
+        self.process(in_data, captured_at)
+        return None, (self.pa_continue if self.running else self.pa_complete)
+
+    def process(self, data, captured_at):
+        """
+        Queues a block for the file and the sink, then publishes its volume.
+        captured_at: float - The perf_counter time the first sample of the block was captured.
+        """
+        try:
+            self.write_queue.put_nowait((data, captured_at))
+        except queue.Full:
+            self.blocks_dropped += 1
+        if self.sink_aligner is not None:
+            self.sink(self.sink_aligner.align(data, captured_at))
+        elif self.sink is not None:
+            self.sink(data)
 
-                # Calculate volume
-                audio_data = np.frombuffer(data, dtype=np.int16)
-                if len(audio_data) == 0 or np.all(audio_data == 0):
-                    self.volume = 0
-                else:
-                    self.volume = np.linalg.norm(audio_data) / np.sqrt(len(audio_data))
+        volume = self.measure(np.frombuffer(data, dtype=np.int16))
+        if volume is not None:
+            now = time.perf_counter()
+            self.volume = volume
+            self.level = (volume, now)
+            self.latencies.append(now - captured_at)
 
-            except Exception as e:
-                print("Audio recording error:", e)
+    def measure(self, samples):
+        """
+        RMS of overlapping windows (window_size samples, every hop_size samples) over the new samples and the tail of the last block.
+        The squares are accumulated as int32 (an int16 square always fits) into an int64 running sum, no float copy of the block.
+        Returns the loudest window of the block, or None if no window was completed.
+        """
+        combined = np.concatenate((self.tail, samples))
+        count = (len(combined) - self.window_size) // self.hop_size + 1
+        if count <= 0:
+            self.tail = combined
+            return None
+        wide = combined.astype(np.int32)
+        sums = np.empty(len(combined) + 1, dtype=np.int64)
+        sums[0] = 0
+        np.cumsum(wide * wide, dtype=np.int64, out=sums[1:])
+        starts = np.arange(count) * self.hop_size
+        window_sums = sums[starts + self.window_size] - sums[starts]
+        self.tail = combined[count * self.hop_size:]
+        return float(np.sqrt(window_sums.max() / self.window_size))
+
+    def latency_stats(self):
+        """Returns the p50/p95/max capture-to-published latency of the volume in milliseconds."""
+        if not self.latencies:
+            return {}
+        values = np.array(self.latencies) * 1000
+        return {"p50": round(float(np.percentile(values, 50)), 2),
+                "p95": round(float(np.percentile(values, 95)), 2),
+                "max": round(float(values.max()), 2)}
+
+    def write_audio(self):
+        """
+        Background thread writing the recorded blocks to the file, flushing every flush_interval seconds.
+        With a clock, the file has its own aligner, so the blocks dropped here become silence instead of shifting the rest.
+        """
+        writer = WRITERS[self.codec](self.filename, self.rate)
+        aligner = self.file_aligner = AudioAligner(self.clock) if self.clock is not None else None
+        last_flush = time.monotonic()
+        while True:
+            item = self.write_queue.get()
+            if item is None:
+                break
+            data, captured_at = item
+            writer.write(aligner.align(data, captured_at) if aligner is not None else data)
+            if time.monotonic() - last_flush > self.flush_interval:
+                writer.flush()
+                last_flush = time.monotonic()
+        writer.close()
 
     def stop(self):
         """
         Stops the audio recording.
         """
-        self.running = False
-        self.stream.stop_stream()
+        if self.pushes_blocks:
+            # stop_stream returns once the callbacks in flight are done, so their blocks are queued before the end of the file
+            self.stream.stop_stream()
+            self.running = False
+            self.stopped.set()
+        else:
+            self.running = False
+            self.stream.stop_stream()
         self.stream.close()
-        self.p.terminate()
+        if self.p is not None:
+            self.p.terminate()
 
-    def save(self):
+    def save(self, timeout=10):
         """
-        Saves the recorded audio to a WAV file.
+        Waits until the recording is completely written to the file. The audio is already on disk, this only finishes it.
         """
-        with wave.open(self.filename, 'wb') as wavefile:
-            wavefile.setnchannels(1)
-            wavefile.setsampwidth(self.p.get_sample_size(pyaudio.paInt16))
-            wavefile.setframerate(self.rate)
-            wavefile.writeframes(b''.join(self.audio_frames))
+        if self.is_alive():
+            self.join(timeout)
+        if self.writer_thread.is_alive():
+            self.writer_thread.join(timeout)
+        if self.blocks_dropped:
+            print(f"Audio recording dropped {self.blocks_dropped} blocks, the disk could not keep up")
+        if self.file_aligner is not None:
+            print("Audio alignment (file):", self.file_aligner.stats())
 
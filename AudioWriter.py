@@ -0,0 +1,74 @@
+import os
+import struct
+import subprocess
+
+class WavStreamWriter:
+    """
+    Writes int16 PCM to a WAV file as it arrives, instead of keeping the whole recording in memory.
+    The RIFF and data sizes in the header are patched every flush, so after a crash the file is still a valid WAV
+    that only misses the audio written since the last flush.
+    filename: str - The WAV file.
+    rate: int - The sampling rate.
+    channels: int, default=1 - The number of channels.
+    """
+    def __init__(self, filename, rate, channels=1):
+        self.file = open(filename, "wb")
+        self.rate = rate
+        self.channels = channels
+        self.data_size = 0
+        self.write_header()
+
+    def write_header(self):
+        block_align = self.channels * 2
+        self.file.write(b"RIFF" + struct.pack("<I", 36 + self.data_size) + b"WAVE")
+        self.file.write(b"fmt " + struct.pack("<IHHIIHH", 16, 1, self.channels, self.rate,
+                                              self.rate * block_align, block_align, 16))
+        self.file.write(b"data" + struct.pack("<I", self.data_size))
+
+    def write(self, data):
+        self.file.write(data)
+        self.data_size += len(data)
+
+    def flush(self):
+        """Patches the header with the current sizes and pushes everything to disk."""
+        position = self.file.tell()
+        self.file.seek(4)
+        self.file.write(struct.pack("<I", 36 + self.data_size))
+        self.file.seek(40)
+        self.file.write(struct.pack("<I", self.data_size))
+        self.file.seek(position)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+class FlacStreamWriter:
+    """
+    Writes int16 PCM to a FLAC file as it arrives, compressed by the ffmpeg binary bundled with imageio-ffmpeg
+    (the standard library has no FLAC encoder). FLAC frames are self-contained, so a crash only loses the last few frames.
+    filename: str - The FLAC file.
+    rate: int - The sampling rate.
+    channels: int, default=1 - The number of channels.
+    """
+    def __init__(self, filename, rate, channels=1):
+        import imageio_ffmpeg
+        command = [
+            imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error",
+            "-f", "s16le", "-ar", str(rate), "-ac", str(channels), "-i", "pipe:0",
+            "-c:a", "flac", "-flush_packets", "1", filename,
+        ]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def write(self, data):
+        self.process.stdin.write(data)
+
+    def flush(self):
+        self.process.stdin.flush()
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+
+WRITERS = {"wav": WavStreamWriter, "flac": FlacStreamWriter}
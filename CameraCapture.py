@@ -0,0 +1,189 @@
+import cv2
+import threading
+import time
+import numpy as np
+import pygame
+
+## What we ask a real camera for. MJPG is decoded by OpenCV (libjpeg-turbo) and lets USB 2 webcams deliver 640x480 at full rate,
+## where YUYV often drops to a low rate or a smaller size. A one-frame driver buffer means read() gives a recent frame, not a stale one.
+## None keeps the driver default.
+CAMERA_SETTINGS = {"fourcc": "MJPG", "size": (640, 480), "fps": 30, "buffer_size": 1}
+
+def open_camera(device, settings=CAMERA_SETTINGS):
+    """
+    Opens a camera with cv2.VideoCapture and negotiates the capture settings, the pixel format first since V4L2 resets
+    the size when it changes. Drivers silently pick the nearest mode they support, so the settings are read back afterwards.
+    Returns (video_cap, accepted) where accepted has the same keys as settings with what the device actually uses.
+    """
+    video_cap = cv2.VideoCapture(device)
+    if settings.get("fourcc"):
+        video_cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*settings["fourcc"]))
+    if settings.get("size"):
+        video_cap.set(cv2.CAP_PROP_FRAME_WIDTH, settings["size"][0])
+        video_cap.set(cv2.CAP_PROP_FRAME_HEIGHT, settings["size"][1])
+    if settings.get("fps"):
+        video_cap.set(cv2.CAP_PROP_FPS, settings["fps"])
+    if settings.get("buffer_size"):
+        video_cap.set(cv2.CAP_PROP_BUFFERSIZE, settings["buffer_size"])
+    return video_cap, read_settings(video_cap)
+
+def read_settings(video_cap):
+    """Returns the fourcc, size, fps and buffer_size a cv2.VideoCapture is using (0 or None when the backend doesn't say)."""
+    code = int(video_cap.get(cv2.CAP_PROP_FOURCC))
+    return {
+        "fourcc": "".join(chr((code >> 8 * i) & 0xFF) for i in range(4)) if code else None,
+        "size": (int(video_cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video_cap.get(cv2.CAP_PROP_FRAME_HEIGHT))),
+        "fps": video_cap.get(cv2.CAP_PROP_FPS),
+        "buffer_size": int(video_cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+    }
+
+def read_frame(video_cap, buffer, raw=None):
+    """
+    Reads the next frame into buffer, in the capture thread so the game loop never pays for the scaling.
+    A frame of the buffer's size is decoded straight into it. Any other size is decoded into raw (allocated once for the size
+    the camera accepted), cropped to the buffer's aspect ratio (a view, no copy) and shrunk with INTER_AREA into the buffer.
+    Returns True if a frame was read.
+    """
+    ret, frame = video_cap.read(buffer if raw is None else raw)
+    if not ret:
+        return False
+    if frame is not buffer:
+        height, width = buffer.shape[:2]
+        frame_height, frame_width = frame.shape[:2]
+        if frame_width * height > width * frame_height:
+            crop = frame_height * width // height
+            frame = frame[:, (frame_width - crop) // 2:(frame_width + crop) // 2]
+        elif frame_width * height < width * frame_height:
+            crop = frame_width * height // width
+            frame = frame[(frame_height - crop) // 2:(frame_height + crop) // 2]
+        cv2.resize(frame, (width, height), dst=buffer, interpolation=cv2.INTER_AREA)
+    return True
+
+class CameraCapture(threading.Thread):
+    """
+    Separate thread that owns the camera. The game loop no longer waits on the USB camera, it just takes the newest frame.
+    The frames are written into a small ring of preallocated buffers, so the capture thread never allocates a new array per frame.
+    device: int, str or object, default=0 - The index (or file path) passed to cv2.VideoCapture,
+        or an object with the same read/release interface (see Sources.py).
+    size: tuple, default=(640, 480) - The (width, height) of the frame buffers.
+    ring_size: int, default=3 - The number of preallocated frame buffers. Needs at least 3 so the reader and writer never share a slot.
+    settings: dict, default=CAMERA_SETTINGS - The capture settings negotiated with a camera index (see open_camera).
+        accepted keeps what the camera agreed to, frames of another size are scaled in the capture thread (see read_frame).
+
+    Counters:
+    - frames_captured: Frames successfully read from the camera.
+    - frames_dropped: Frames that were overwritten before the game loop ever read them.
+    - frames_reused: Times the game loop got the same frame again because the camera had nothing new.
+    """
+    def __init__(self, device=0, size=(640, 480), ring_size=3, settings=CAMERA_SETTINGS):
+        super(CameraCapture, self).__init__(daemon=True)
+        if ring_size < 3:
+            raise ValueError("ring_size must be at least 3")
+        self.device = device
+        self.size = size
+        self.ring = [np.zeros((size[1], size[0], 3), dtype=np.uint8) for _ in range(ring_size)]
+        self.lock = threading.Lock()
+        self.latest = -1      # Slot holding the newest complete frame
+        self.reading = -1     # Slot currently handed out to the game loop
+        self.fresh = False    # True when `latest` has not been read yet
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.frames_reused = 0
+        self.running = False
+
+        self.raw = None
+        self.accepted = None
+        if hasattr(device, "read"):
+            self.video_cap = device
+        elif isinstance(device, int):
+            self.video_cap, self.accepted = open_camera(device, settings)
+            print("Camera settings:", self.accepted)
+            width, height = self.accepted["size"]
+            if (width, height) != tuple(size) and width and height:
+                self.raw = np.zeros((height, width, 3), dtype=np.uint8)
+        else:
+            self.video_cap = cv2.VideoCapture(device)
+
+    def run(self):
+        """
+        Background thread to read the camera. Each frame is decoded straight into a free ring slot, then published as the newest one.
+        """
+        self.running = True
+        slot = 0
+        while self.running:
+            with self.lock:
+                slot = self.next_slot(slot)
+            if not read_frame(self.video_cap, self.ring[slot], self.raw):
+                time.sleep(0.005)
+                continue
+
+            with self.lock:
+                if self.fresh:
+                    self.frames_dropped += 1
+                self.latest = slot
+                self.fresh = True
+                self.frames_captured += 1
+
+    def next_slot(self, slot):
+        """Pick the next ring slot that is neither the newest frame nor the one the game loop is holding."""
+        for _ in range(len(self.ring)):
+            slot = (slot + 1) % len(self.ring)
+            if slot != self.latest and slot != self.reading:
+                return slot
+        return slot
+
+    def read(self):
+        """
+        Non-blocking read, with the same return shape as cv2.VideoCapture.read.
+        Returns (True, frame) with the newest frame, or (False, None) if the camera hasn't produced anything yet.
+        The returned frame stays valid until the next call to read.
+        """
+        with self.lock:
+            if self.latest < 0:
+                return False, None
+            if not self.fresh:
+                self.frames_reused += 1
+            self.reading = self.latest
+            self.fresh = False
+            return True, self.ring[self.reading]
+
+    def stats(self):
+        """Returns the capture counters as a dict."""
+        with self.lock:
+            return {
+                "frames_captured": self.frames_captured,
+                "frames_dropped": self.frames_dropped,
+                "frames_reused": self.frames_reused,
+            }
+
+    def release(self):
+        """
+        Stops the capture thread and releases the camera.
+        """
+        self.running = False
+        if self.is_alive():
+            self.join(timeout=1)
+        self.video_cap.release()
+
+class CameraSurface:
+    """
+    Persistent pygame Surface for the camera background.
+    The old path did cvtColor + np.rot90 + surfarray.make_surface, allocating a new array and a new Surface every frame.
+    Here the Surface is created once on top of a preallocated BGR buffer (pygame reads it in place through frombuffer),
+    so each frame is a single cv2.flip into that buffer and one blit. The flip keeps the mirrored view the rot90 trick gave us.
+    size: tuple, default=(640, 480) - The (width, height) of the surface.
+    """
+    def __init__(self, size=(640, 480)):
+        self.size = size
+        self.buffer = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        self.scaled = np.zeros_like(self.buffer)
+        self.surface = pygame.image.frombuffer(self.buffer, size, "BGR")
+
+    def update(self, frame):
+        """
+        Copies a BGR camera frame into the persistent surface and returns it.
+        """
+        if frame.shape[1] != self.size[0] or frame.shape[0] != self.size[1]:
+            frame = cv2.resize(frame, self.size, dst=self.scaled)
+        cv2.flip(frame, 1, dst=self.buffer)
+        return self.surface
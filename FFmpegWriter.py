@@ -0,0 +1,123 @@
+import queue
+import socket
+import subprocess
+import threading
+import imageio_ffmpeg
+
+class FFmpegWriter:
+    """
+    Streams the game video and the microphone audio into a single ffmpeg process while the game runs,
+    so the final muxed file is ready as soon as the game ends (no second encode with moviepy).
+    Uses the ffmpeg binary bundled with imageio-ffmpeg. Video frames go through ffmpeg's stdin as raw BGR,
+    the PCM audio goes through a local TCP socket (works the same on Windows and Linux, unlike named pipes).
+    It has the same write(frame) / release() interface as cv2.VideoWriter, so it can be handed to VideoEncoder.
+    filename: str - The output file, e.g. "output/final_output.avi".
+    size: tuple, default=(640, 480) - The (width, height) of the frames.
+    fps: int, default=15 - The frame rate of the video.
+    rate: int, default=44100 - The sampling rate of the int16 mono audio.
+    preset: str, default="ultrafast" - The x264 preset, it has to keep up with the game in real time.
+    max_buffered_seconds: float, default=6 - The audio waiting for ffmpeg before new blocks are dropped, in seconds.
+    block_size: int, default=256 - The samples in a block given to write_audio (the recorder's hop_size in callback mode).
+    """
+    def __init__(self, filename, size=(640, 480), fps=15, rate=44100, preset="ultrafast", max_buffered_seconds=6,
+                 block_size=256):
+        self.filename = filename
+        self.size = size
+        self.audio_queue = queue.Queue(maxsize=max(1, round(max_buffered_seconds * rate / block_size)))
+        self.audio_closed = False
+        self.audio_blocks_dropped = 0
+
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(1)
+        port = self.server.getsockname()[1]
+
+        command = [
+            imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{size[0]}x{size[1]}", "-framerate", str(fps),
+            "-thread_queue_size", "512", "-i", "pipe:0",
+            # Raw PCM needs no probing, without this ffmpeg waits for seconds of audio before it reads any more video
+            "-probesize", "32", "-analyzeduration", "0",
+            "-f", "s16le", "-ar", str(rate), "-ac", "1",
+            "-thread_queue_size", "512", "-i", f"tcp://127.0.0.1:{port}",
+            "-map", "0:v", "-map", "1:a",
+            "-c:v", "libx264", "-preset", preset, "-pix_fmt", "yuv420p",
+            "-c:a", "aac",
+            filename,
+        ]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+        self.audio_thread = threading.Thread(target=self.send_audio, daemon=True)
+        self.audio_thread.start()
+
+    def send_audio(self):
+        """
+        Background thread that waits for ffmpeg to connect, then forwards the queued PCM blocks.
+        The audio recorder only puts blocks in a bounded queue, so it never waits on ffmpeg.
+        """
+        self.server.settimeout(10)
+        try:
+            connection, _ = self.server.accept()
+        except OSError as e:
+            print("FFmpeg audio connection error:", e)
+            return
+        with connection:
+            while True:
+                data = self.audio_queue.get()
+                if data is None:
+                    break
+                try:
+                    connection.sendall(data)
+                except OSError as e:
+                    print("FFmpeg audio write error:", e)
+                    break
+
+    def write(self, frame):
+        """
+        Writes one BGR frame of shape (height, width, 3).
+        """
+        try:
+            self.process.stdin.write(frame.data.cast("B") if frame.flags.c_contiguous else frame.tobytes())
+        except (BrokenPipeError, ValueError) as e:
+            print("FFmpeg video write error:", e)
+
+    def write_audio(self, data):
+        """
+        Queues one block of int16 PCM for the audio stream. Safe to call from the audio thread, it never blocks:
+        when ffmpeg stalls and the queue is full the block is dropped and counted.
+        """
+        try:
+            self.audio_queue.put_nowait(data)
+        except queue.Full:
+            self.audio_blocks_dropped += 1
+
+    def close_audio(self):
+        """
+        Ends the audio stream. Call it as soon as the recorder stops: ffmpeg interleaves the two inputs,
+        so it stops reading video that is ahead of the audio until the audio either catches up or ends.
+        """
+        if not self.audio_closed:
+            self.audio_closed = True
+            if self.audio_thread.is_alive():  # Otherwise nothing is left to drain a full queue
+                try:
+                    self.audio_queue.put(None, timeout=10)
+                except queue.Full:
+                    print("FFmpeg audio stream did not drain, closing it anyway")
+
+    def release(self, timeout=10):
+        """
+        Closes both streams and waits for ffmpeg to finish writing the file.
+        """
+        self.close_audio()
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.audio_thread.join(timeout)
+        self.server.close()
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            print("FFmpeg did not finish in time, the output may be truncated")
+        if self.audio_blocks_dropped:
+            print(f"FFmpeg audio dropped {self.audio_blocks_dropped} blocks, ffmpeg could not keep up")
@@ -0,0 +1,70 @@
+import json
+import os
+
+TRACE_FILE = "replay.jsonl"
+CAMERA_FILE = "camera.avi"
+
+class TraceWriter:
+    """
+    Writes the inputs of a session as JSON lines, so Replay.py can simulate it again tick for tick:
+    - a header: {"version", "seed", "tick_rate", "camera", "audio", "level"}
+    - one {"v": volume} per simulation tick, in order (the only input the simulation reads),
+    - one {"frame": slot, "tick", "alpha", "camera", "overlay"} per recorded video frame: the video slot, how many ticks had run,
+      the interpolation alpha, whether there was a camera frame and the texts drawn over the world,
+    - {"event": name, "tick"} for the inputs that aren't per tick, e.g. quitting,
+    - an {"end": state} line with the final game state, which the replay must reproduce.
+    The raw camera frames of the recorded slots go to camera.avi (see Game), next to the audio file.
+    Floats are written in full (json uses repr), a rounded volume could change a jump and the whole run after it.
+    directory: str - Where replay.jsonl is written.
+    seed: int - The seed of the game's random generator.
+    tick_rate: int - The simulation tick rate.
+    audio_file: str - The name of the session's audio file in the same directory.
+    level: str - The level file that was played.
+    """
+    def __init__(self, directory, seed, tick_rate, audio_file, level):
+        self.file = open(os.path.join(directory, TRACE_FILE), "w")
+        self.ticks = 0
+        self.write({"version": 1, "seed": seed, "tick_rate": tick_rate, "camera": CAMERA_FILE, "audio": audio_file,
+                    "level": level})
+
+    def write(self, record):
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def tick(self, volume):
+        self.write({"v": volume})
+        self.ticks += 1
+
+    def frame(self, slot, alpha, camera, overlay):
+        self.write({"frame": slot, "tick": self.ticks, "alpha": alpha, "camera": camera, "overlay": overlay})
+
+    def event(self, name):
+        self.write({"event": name, "tick": self.ticks})
+
+    def close(self, state):
+        self.write({"end": state})
+        self.file.close()
+
+def load_trace(directory):
+    """
+    Reads replay.jsonl from a session directory.
+    Returns (header, volumes, frames, events, end) with frames and events as lists of dicts, end None if the session didn't finish.
+    """
+    header = None
+    volumes = []
+    frames = []
+    events = []
+    end = None
+    with open(os.path.join(directory, TRACE_FILE)) as file:
+        for line in file:
+            record = json.loads(line)
+            if header is None:
+                header = record
+            elif "v" in record:
+                volumes.append(record["v"])
+            elif "frame" in record:
+                frames.append(record)
+            elif "event" in record:
+                events.append(record)
+            elif "end" in record:
+                end = record["end"]
+    return header, volumes, frames, events, end
@@ -0,0 +1,145 @@
+"""
+Level files and the streaming of their chunks into the World.
+A level file is JSON lines: a header, then the level cut into chunks of chunk_width pixels, in x order:
+    {"version": 1, "chunk_width": 640, "castle": [x, y]}
+    {"x": 0, "platforms": [[x, y], ...], "blocks": [[x, y], ...]}
+    {"x": 640, ...}
+Platforms are given by their top left (a pipe hangs under each one), blocks and the castle by their bottom centre,
+all in world coordinates. The bottom limit for the platforms is around 400 since the wave hides anything lower.
+Chunks without objects are left out. Since the file is only read as far as the camera got,
+a level thousands of screens long starts as fast as a short one, and only the chunks around the viewport are in memory.
+"""
+import json
+from collections import deque
+import pygame
+from ObjectPool import ObjectPool
+from Sprite import Block
+
+LEVEL_FILE = "Levels/level1.jsonl"
+ENDLESS = "endless"  # Game(level=ENDLESS) plays the procedural endless_chunks instead of a file
+CHUNK_WIDTH = 640
+
+def write_level(path, platforms, blocks, castle, chunk_width=CHUNK_WIDTH):
+    """
+    Writes a level file.
+    platforms: iterable of (x, y) - The top left of each platform.
+    blocks: iterable of (x, y) - The bottom centre of each block.
+    castle: (x, y) - The bottom centre of the castle.
+    chunk_width: int, default=CHUNK_WIDTH - The width of a chunk in pixels.
+    """
+    chunks = {}
+    for kind, positions in (("platforms", platforms), ("blocks", blocks)):
+        for x, y in positions:
+            chunk = chunks.setdefault(x // chunk_width, {"x": x // chunk_width * chunk_width, "platforms": [], "blocks": []})
+            chunk[kind].append([x, y])
+    with open(path, "w") as file:
+        file.write(json.dumps({"version": 1, "chunk_width": chunk_width, "castle": list(castle)}, separators=(",", ":")) + "\n")
+        for index in sorted(chunks):
+            chunk = chunks[index]
+            chunk["platforms"].sort()
+            chunk["blocks"].sort()
+            file.write(json.dumps(chunk, separators=(",", ":")) + "\n")
+
+def open_level(path):
+    """
+    Opens a level file and reads its header.
+    Returns (header, chunks), chunks is a generator reading the chunks from the file one at a time, in x order.
+    """
+    file = open(path)
+    header = json.loads(file.readline())
+
+    def chunks():
+        with file:
+            for line in file:
+                yield json.loads(line)
+    return header, chunks()
+
+def endless_chunks(rng, chunk_width=CHUNK_WIDTH, platform_width=200):
+    """
+    Generates an endless level, chunk by chunk in the format of the level files, as far as it is iterated.
+    Every gap can be cleared with one scream from the end of a platform: the next platform is at most 75 px higher
+    with a gap of 40-80 px, or level or lower with a gap of 60-110 px. Heights stay between 175 and 350.
+    From the third platform on, one in three carries a block.
+    rng: random.Random - The source of randomness, e.g. Game.rng, so the same seed gives the same level (and replay).
+    chunk_width: int, default=CHUNK_WIDTH - The width of a chunk in pixels.
+    platform_width: int, default=200 - The width of a platform.
+    """
+    x, y = 100, 350  # Starts like level1, on a platform under the player
+    chunk = {"x": 0, "platforms": [], "blocks": []}
+    count = 0
+    while True:
+        if x // chunk_width * chunk_width != chunk["x"]:
+            yield chunk
+            chunk = {"x": x // chunk_width * chunk_width, "platforms": [], "blocks": []}
+        chunk["platforms"].append([x, y])
+        if count >= 2 and rng.random() < 1 / 3:
+            chunk["blocks"].append([x + rng.randint(40, platform_width - 40), y])
+        count += 1
+        next_y = min(max(y + rng.randint(-75, 75), 175), 350)
+        x += platform_width + (rng.randint(40, 80) if next_y < y else rng.randint(60, 110))
+        y = next_y
+
+class LevelStreamer:
+    """
+    Keeps the part of the level around the viewport in the World. A chunk is instantiated (platform and pipe rects,
+    Block sprites) and added to the World once its left edge is within lookahead of the viewport, and removed again
+    once everything in it has scrolled past the left of the viewport. The removed objects go back to object pools and
+    are reset for the next chunks, so streaming doesn't allocate in the long run. The lookahead must be at least the width
+    of a LevelCompositor tile, so a tile never scrolls in before its objects are loaded.
+    world: World - The World the objects go into.
+    chunks: iterator of dict - The chunks in x order, e.g. from open_level or endless_chunks.
+    platform_size: (int, int) - The size of a platform.
+    pipe_size: (int, int) - The size of the pipe under a platform.
+    lookahead: int, default=640 - How far right of the viewport chunks are loaded.
+    """
+    def __init__(self, world, chunks, platform_size, pipe_size, lookahead=640):
+        self.world = world
+        self.chunks = iter(chunks)
+        self.lookahead = lookahead
+        # Released objects are reused by the next chunks, a long run stops allocating once the pools cover a screen
+        self.platform_pool = ObjectPool(lambda: pygame.Rect((0, 0), platform_size))
+        self.pipe_pool = ObjectPool(lambda: pygame.Rect((0, 0), pipe_size))
+        self.block_pool = ObjectPool(lambda: Block(0, 0))
+        self.next_chunk = next(self.chunks, None)
+        self.loaded = deque()  # (right edge, platforms, pipes, blocks) of the chunks in the World, in x order
+        self.chunks_loaded = 0
+        self.chunks_released = 0
+
+    def load(self, chunk):
+        platforms = []
+        pipes = []
+        for position in chunk["platforms"]:
+            platform = self.platform_pool.acquire()
+            platform.topleft = position
+            pipe = self.pipe_pool.acquire()
+            pipe.midtop = platform.midbottom
+            platforms.append(platform)
+            pipes.append(pipe)
+        blocks = []
+        for x, y in chunk["blocks"]:
+            block = self.block_pool.acquire()
+            block.reset(x, y)
+            blocks.append(block)
+        self.world.add(platforms, pipes, blocks)
+        right = max([rect.right for rect in platforms + pipes] + [block.rect.right for block in blocks], default=chunk["x"])
+        self.loaded.append((right, platforms, pipes, blocks))
+        self.chunks_loaded += 1
+
+    def release(self):
+        _, platforms, pipes, blocks = self.loaded.popleft()
+        self.world.remove(platforms, pipes, blocks)
+        for platform in platforms:
+            self.platform_pool.release(platform)
+        for pipe in pipes:
+            self.pipe_pool.release(pipe)
+        for block in blocks:
+            self.block_pool.release(block)
+        self.chunks_released += 1
+
+    def update(self, viewport):
+        """Loads the chunks coming into range and releases the ones that scrolled past, for the viewport in world coordinates."""
+        while self.next_chunk is not None and self.next_chunk["x"] < viewport.right + self.lookahead:
+            self.load(self.next_chunk)
+            self.next_chunk = next(self.chunks, None)
+        while self.loaded and self.loaded[0][0] <= viewport.left:
+            self.release()
@@ -0,0 +1,68 @@
+import pygame
+
+class LevelCompositor:
+    """
+    Draws the static level (platforms, pipes and the castle) from pre-rendered strip tiles instead of one blit per object.
+    The world is cut into columns of tile_width pixels. A tile is rendered the first time it scrolls into the viewport,
+    then every frame is one or two blits whatever the number of objects on screen, and a tile is dropped once it has
+    scrolled out, so memory stays at two or three tiles for any level length.
+    Tiles keep their per-pixel alpha and are RLE accelerated: SDL encodes the transparent runs once, a blit then skips them
+    and only blends the level pixels, which is cheaper than blitting the objects one by one (see benchmarks/bench_level_draw.py).
+    world: World - The level, the tiles are filled from its platform and pipe indexes and its castle.
+    platform_image: Surface - The image drawn at each platform.
+    pipe_image: Surface - The image drawn at each pipe.
+    castle_image: Surface - The image drawn at the castle.
+    tile_width: int, default=640 - The width of a tile, at least the viewport width so a frame never needs more than two.
+    height: int, default=480 - The height of the tiles, the viewport height.
+    """
+    def __init__(self, world, platform_image, pipe_image, castle_image, tile_width=640, height=480):
+        self.world = world
+        self.platform_image = platform_image
+        self.pipe_image = pipe_image
+        self.castle_image = castle_image
+        self.tile_width = tile_width
+        self.height = height
+        self.tiles = {}  # column index -> Surface, None for a column without static geometry
+        self.tiles_rendered = 0
+
+    def render_tile(self, index):
+        """Renders the static geometry overlapping column index into a new tile, None if there is none."""
+        left = index * self.tile_width
+        area = pygame.Rect(left, 0, self.tile_width, self.height)
+        platforms = self.world.visible_platforms(area)
+        pipes = self.world.visible_pipes(area)
+        castle = self.world.castle_visible(area)
+        self.tiles_rendered += 1
+        if not platforms and not pipes and not castle:
+            return None
+
+        # Same order as the objects were drawn one by one: platforms, the pipes under them, then the castle
+        tile = pygame.Surface(area.size, pygame.SRCALPHA).convert_alpha()
+        tile.fill((0, 0, 0, 0))
+        for platform in platforms:
+            tile.blit(self.platform_image, platform.move(-left, 0))
+        for pipe in pipes:
+            tile.blit(self.pipe_image, pipe.move(-left, 0))
+        if castle:
+            tile.blit(self.castle_image, self.world.castle.move(-left, 0))
+        tile.set_alpha(255, pygame.RLEACCEL)
+        return tile
+
+    def draw(self, screen, offset, width):
+        """
+        Blits the static level seen from camera offset onto screen, rendering the tiles that scroll in
+        and dropping the ones that scrolled out.
+        screen: Surface - The surface to draw on.
+        offset: int - The camera x position in world coordinates.
+        width: int - The viewport width.
+        """
+        first = offset // self.tile_width
+        last = (offset + width - 1) // self.tile_width
+        for index in range(first, last + 1):
+            if index not in self.tiles:
+                self.tiles[index] = self.render_tile(index)
+            tile = self.tiles[index]
+            if tile is not None:
+                screen.blit(tile, (index * self.tile_width - offset, 0))
+        for index in [index for index in self.tiles if index < first or index > last]:
+            del self.tiles[index]
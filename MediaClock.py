@@ -0,0 +1,65 @@
+import time
+
+class MediaClock:
+    """
+    The shared monotonic clock of a recording. Video frames and audio blocks are stamped with time.perf_counter() when they are
+    captured, and each one is placed in the output by its time since start(), not by how many frames or samples came before it.
+    A game loop running below the video frame rate, or an audio device running a little fast, then can't pull the two streams apart.
+    fps: float - The frame rate of the recorded video.
+    rate: int - The sampling rate of the recorded audio.
+    """
+    def __init__(self, fps, rate):
+        self.fps = fps
+        self.rate = rate
+        self.epoch = None
+
+    def start(self, epoch=None):
+        """Sets time zero of the recording, now if no perf_counter time is given."""
+        self.epoch = time.perf_counter() if epoch is None else epoch
+
+    def frame_index(self, timestamp):
+        """The video frame slot a perf_counter time falls in."""
+        return int((timestamp - self.epoch) * self.fps)
+
+    def sample_index(self, timestamp):
+        """The audio sample a perf_counter time falls on."""
+        return round((timestamp - self.epoch) * self.rate)
+
+class AudioAligner:
+    """
+    Keeps a stream of int16 mono blocks on the clock: when the samples written so far and the timestamp of the next block disagree
+    by more than the tolerance, the gap is filled with silence (lost blocks, a slow device) or the overlap is cut from the block
+    (a fast device). The first block is aligned exactly, so the audio starts at the same time zero as the video.
+    clock: MediaClock - The shared clock, started before the first block arrives.
+    tolerance: float, default=0.04 - Seconds of drift allowed before correcting, above the timestamp jitter but below what is audible.
+    """
+    SAMPLE_WIDTH = 2
+
+    def __init__(self, clock, tolerance=0.04):
+        self.clock = clock
+        self.tolerance = round(tolerance * clock.rate)
+        self.position = 0  # Samples given out so far
+        self.samples_padded = 0
+        self.samples_trimmed = 0
+
+    def align(self, data, timestamp):
+        """
+        Returns the block padded or trimmed to its place on the clock.
+        timestamp: float - The perf_counter time the first sample of the block was captured.
+        """
+        offset = self.clock.sample_index(timestamp) - self.position
+        tolerance = self.tolerance if self.position else 0
+        if offset > tolerance:
+            data = bytes(offset * self.SAMPLE_WIDTH) + data
+            self.samples_padded += offset
+        elif offset < -tolerance:
+            trim = min(-offset, len(data) // self.SAMPLE_WIDTH)
+            data = data[trim * self.SAMPLE_WIDTH:]
+            self.samples_trimmed += trim
+        self.position += len(data) // self.SAMPLE_WIDTH
+        return data
+
+    def stats(self):
+        """Returns the corrections in milliseconds."""
+        return {"padded_ms": round(self.samples_padded * 1000 / self.clock.rate, 1),
+                "trimmed_ms": round(self.samples_trimmed * 1000 / self.clock.rate, 1)}
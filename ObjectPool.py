@@ -0,0 +1,26 @@
+class ObjectPool:
+    """
+    Free list of reusable objects. acquire hands out a released object when there is one and only creates a new one
+    when the pool is empty, so a stream of short-lived objects (e.g. the level objects of LevelStreamer) stops allocating
+    once the pool holds as many as are ever alive at the same time. The caller resets what it gets.
+    factory: callable - Creates a new object.
+    """
+    def __init__(self, factory):
+        self.factory = factory
+        self.free = []
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self):
+        if self.free:
+            self.reused += 1
+            return self.free.pop()
+        self.created += 1
+        return self.factory()
+
+    def release(self, item):
+        self.free.append(item)
+
+    def stats(self):
+        """Returns the pool counters as a dict."""
+        return {"created": self.created, "reused": self.reused, "free": len(self.free)}
@@ -0,0 +1,363 @@
+"""
+Optional multi-process pipeline: camera capture, audio recording/analysis and video encoding each run in their own worker process,
+so they no longer compete with the game loop for the GIL. The game process only simulates and composites.
+Frames go through multiprocessing.shared_memory slots (only a slot number crosses the process boundary), the volume through
+a small shared array. The classes have the interface of CameraCapture, AudioRecorder and VideoEncoder, so Game can swap them in.
+The workers are started with the spawn start method on every platform (CONTEXT), also where the default is fork:
+Game creates them on a startup thread while other threads (SDL, the image decoding pool) run, and a forked child would
+inherit the locks those threads hold, still locked. They are spawned as soon as the objects are created, so the slow part
+(every module is imported again) happens before the game loop, and start() only lets them go. Spawned workers import
+the main script too, so a script creating a Game with pipeline="processes" needs the if __name__ == "__main__": guard.
+Everything given to a worker (camera device, audio stream, writer factory, clock) is pickled when the process is spawned,
+so it must be picklable: a device index or path rather than an opened cv2.VideoCapture, functools.partial(FFmpegWriter, ...)
+rather than a writer.
+"""
+
+import cv2
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from AudioRecorder import AudioRecorder
+from CameraCapture import CAMERA_SETTINGS, open_camera, read_frame
+from VideoEncoder import POLICIES, grab_frame
+
+CONTEXT = multiprocessing.get_context("spawn")  # The workers and the primitives they share, see the module docstring
+
+class SharedFrames:
+    """
+    `count` uint8 frames of the same shape in one block of shared memory, seen as a numpy array in every process.
+    Pickling it (e.g. as a Process argument) attaches the other process to the same block instead of copying the frames.
+    count: int - The number of frames.
+    shape: tuple - The shape of one frame, e.g. (480, 640, 3).
+    name: str, default=None - Attach to an existing block, None creates a new one (owned, unlinked by close).
+    """
+    def __init__(self, count, shape, name=None):
+        self.count = count
+        self.shape = tuple(shape)
+        self.owner = name is None
+        size = count * int(np.prod(shape))
+        self.memory = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self.frames = np.ndarray((count,) + self.shape, dtype=np.uint8, buffer=self.memory.buf)
+
+    def __reduce__(self):
+        return SharedFrames, (self.count, self.shape, self.memory.name)
+
+    def __getitem__(self, slot):
+        return self.frames[slot]
+
+    def close(self):
+        """Detaches from the block, and frees it if this process created it."""
+        del self.frames
+        try:
+            self.memory.close()
+        except BufferError:
+            pass  # A frame is still referenced somewhere, the mapping goes away with it
+        if self.owner:
+            self.memory.unlink()
+
+## Fields of the camera header
+LATEST, READING, FRESH, CAPTURED, DROPPED = range(5)
+
+def capture_frames(device, settings, frames, header, go, stop):
+    """
+    Camera worker: the same ring logic as CameraCapture.run, with the slots in shared memory and the bookkeeping in a shared header.
+    """
+    raw = None
+    if hasattr(device, "read"):
+        video_cap = device
+    elif isinstance(device, int):
+        video_cap, accepted = open_camera(device, settings)
+        print("Camera settings:", accepted)
+        width, height = accepted["size"]
+        if (height, width) != frames.shape[:2] and width and height:
+            raw = np.zeros((height, width, 3), dtype=np.uint8)
+    else:
+        video_cap = cv2.VideoCapture(device)
+    go.wait()
+    slot = 0
+    while not stop.is_set():
+        with header.get_lock():
+            for _ in range(frames.count):
+                slot = (slot + 1) % frames.count
+                if slot != header[LATEST] and slot != header[READING]:
+                    break
+        if not read_frame(video_cap, frames[slot], raw):
+            time.sleep(0.005)
+            continue
+
+        with header.get_lock():
+            if header[FRESH]:
+                header[DROPPED] += 1
+            header[LATEST] = slot
+            header[FRESH] = 1
+            header[CAPTURED] += 1
+    video_cap.release()
+
+class ProcessCameraCapture:
+    """
+    CameraCapture running in a worker process. read() returns a view of the newest shared slot, valid until the next read.
+    device: int, str or object, default=0 - The camera index or path, or a picklable object with read/release (see Sources.py).
+    size: tuple, default=(640, 480) - The (width, height) of the frame slots.
+    ring_size: int, default=3 - The number of slots, at least 3 so the reader and writer never share one.
+    settings: dict, default=CAMERA_SETTINGS - The capture settings negotiated with a camera index, see open_camera.
+    """
+    def __init__(self, device=0, size=(640, 480), ring_size=3, settings=CAMERA_SETTINGS):
+        if ring_size < 3:
+            raise ValueError("ring_size must be at least 3")
+        self.frames = SharedFrames(ring_size, (size[1], size[0], 3))
+        self.header = CONTEXT.Array("q", [-1, -1, 0, 0, 0])
+        self.go = CONTEXT.Event()
+        self.stop_event = CONTEXT.Event()
+        self.frames_reused = 0
+        self.process = CONTEXT.Process(target=capture_frames, name="camera", daemon=True,
+                                       args=(device, settings, self.frames, self.header, self.go, self.stop_event))
+        self.process.start()
+
+    def start(self):
+        self.go.set()
+
+    def read(self):
+        """Non-blocking read, see CameraCapture.read."""
+        with self.header.get_lock():
+            latest = self.header[LATEST]
+            if latest < 0:
+                return False, None
+            if not self.header[FRESH]:
+                self.frames_reused += 1
+            self.header[READING] = latest
+            self.header[FRESH] = 0
+        return True, self.frames[latest]
+
+    def stats(self):
+        """Returns the capture counters as a dict."""
+        with self.header.get_lock():
+            return {
+                "frames_captured": self.header[CAPTURED],
+                "frames_dropped": self.header[DROPPED],
+                "frames_reused": self.frames_reused,
+            }
+
+    def release(self):
+        """Stops the worker, which releases the camera, and frees the slots."""
+        self.stop_event.set()
+        self.go.set()
+        if self.process.is_alive():
+            self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.frames.close()
+
+class SharedLevelRecorder(AudioRecorder):
+    """AudioRecorder that also copies every published level into a shared (volume, time) array."""
+    def __init__(self, shared_level, *args, **kwargs):
+        self.shared_level = shared_level
+        super(SharedLevelRecorder, self).__init__(*args, **kwargs)
+
+    def process(self, data, captured_at):
+        level = self.level
+        super(SharedLevelRecorder, self).process(data, captured_at)
+        if self.level is not level:
+            with self.shared_level.get_lock():
+                self.shared_level[:] = self.level
+
+def record_audio(shared_level, epoch, go, stop, results, sink, args, kwargs):
+    """
+    Audio worker: records and analyses the audio from go until stop is set, then reports its counters through results.
+    epoch: multiprocessing.Value - The epoch of the game's clock, copied into this process's clock at go.
+    sink: multiprocessing.Queue - Gets the PCM blocks for the encoder worker, or None.
+    """
+    recorder = SharedLevelRecorder(shared_level, *args, sink=sink.put if sink is not None else None, **kwargs)
+    go.wait()
+    if not stop.is_set():
+        if recorder.clock is not None:
+            recorder.clock.start(epoch.value)
+        recorder.start()
+        stop.wait()
+    recorder.stop()
+    recorder.save()
+    results.put({"latency": recorder.latency_stats(), "blocks_dropped": recorder.blocks_dropped})
+
+class ProcessAudioRecorder:
+    """
+    AudioRecorder running in a worker process, the game process only reads the shared volume.
+    sink: multiprocessing.Queue, default=None - Where the PCM blocks go, e.g. ProcessVideoEncoder.audio_queue.
+    The other arguments are the ones of AudioRecorder.
+    """
+    def __init__(self, filename="output/output.wav", rate=44100, sink=None, **kwargs):
+        self.clock = kwargs.get("clock")
+        self.shared_level = CONTEXT.Array("d", [0, time.perf_counter()])
+        self.epoch = CONTEXT.Value("d", 0)
+        self.go = CONTEXT.Event()
+        self.stop_event = CONTEXT.Event()
+        self.results = CONTEXT.Queue()
+        self.result = {}
+        self.process = CONTEXT.Process(target=record_audio, name="audio", daemon=True,
+                                       args=(self.shared_level, self.epoch, self.go, self.stop_event, self.results,
+                                             sink, (filename, rate), kwargs))
+        self.process.start()
+
+    @property
+    def level(self):
+        """(volume, perf_counter time it was published), read in one go."""
+        with self.shared_level.get_lock():
+            return tuple(self.shared_level)
+
+    @property
+    def volume(self):
+        return self.shared_level[0]
+
+    def start(self):
+        """Starts recording, on the game's clock if there is one (start the clock first)."""
+        if self.clock is not None:
+            self.epoch.value = self.clock.epoch
+        self.go.set()
+
+    def stop(self):
+        self.stop_event.set()
+        self.go.set()
+
+    def save(self, timeout=10):
+        """Waits for the worker to finish the file and collects its counters."""
+        try:
+            self.result = self.results.get(timeout=timeout)
+        except queue.Empty:
+            print("Audio worker did not finish in time")
+        self.process.join(timeout)
+        if self.result.get("blocks_dropped"):
+            print(f"Audio recording dropped {self.result['blocks_dropped']} blocks, the disk could not keep up")
+
+    def latency_stats(self):
+        return self.result.get("latency", {})
+
+def encode_frames(writer_factory, frames, filled, free, audio_queue, results):
+    """
+    Encoder worker: converts and writes the frames in the order they were filled, with the same slot logic as VideoEncoder.run,
+    and forwards the PCM blocks to writer.write_audio from a second thread. None on audio_queue ends the audio stream.
+    """
+    writer = writer_factory()
+    audio_thread = None
+    if audio_queue is not None:
+        def forward_audio():
+            while True:
+                data = audio_queue.get()
+                if data is None:
+                    writer.close_audio()
+                    break
+                writer.write_audio(data)
+        audio_thread = threading.Thread(target=forward_audio, daemon=True)
+        audio_thread.start()
+
+    frames_written = 0
+    frames_repeated = 0
+    last = None
+    while True:
+        item = filled.get()
+        if item is None:
+            break
+        slot, channels, conversion, index = item
+        frame = cv2.cvtColor(frames[slot][:, :, :channels], conversion)
+        free.put(slot)
+        if index is not None:
+            while frames_written < index:
+                writer.write(frame if last is None else last)
+                frames_written += 1
+                frames_repeated += 1
+        writer.write(frame)
+        frames_written += 1
+        last = frame
+
+    if audio_thread is not None:
+        audio_thread.join(10)
+    writer.release()
+    results.put({"frames_written": frames_written, "frames_repeated": frames_repeated})
+
+class ProcessVideoEncoder:
+    """
+    VideoEncoder running in a worker process. The game process copies the screen straight into a free shared slot
+    and sends the slot number, the conversion and the cv2 work happen in the worker.
+    writer_factory: callable - Picklable, creates the writer in the worker, e.g. functools.partial(FFmpegWriter, path, fps=15).
+    max_queue: int, default=30 - The number of shared slots.
+    policy: str, default="drop_oldest" - "block" waits for a free slot, the others drop the frame being submitted when every
+        slot is taken (the queued frames are already in the worker, the oldest can't be taken back). With a clock the slot
+        of a dropped frame is filled by repeating the previous one.
+    clock: MediaClock, default=None - See VideoEncoder.
+    size: tuple, default=(640, 480) - The (width, height) of the frames.
+    audio: bool, default=False - Forward PCM blocks put on audio_queue to writer.write_audio (for FFmpegWriter).
+    """
+    def __init__(self, writer_factory, max_queue=30, policy="drop_oldest", clock=None, size=(640, 480), audio=False):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r}, expected one of {POLICIES}")
+        self.policy = policy
+        self.clock = clock
+        self.next_index = 0
+        self.frames = SharedFrames(max_queue, (size[1], size[0], 4))
+        self.filled = CONTEXT.Queue()
+        self.free = CONTEXT.Queue()
+        for slot in range(max_queue):
+            self.free.put(slot)
+        self.audio_queue = CONTEXT.Queue() if audio else None
+        self.audio_closed = False
+        self.results = CONTEXT.Queue()
+        self.result = {}
+        self.frames_submitted = 0
+        self.frames_dropped = 0
+        self.frames_skipped = 0
+        self.process = CONTEXT.Process(target=encode_frames, name="encoder", daemon=True,
+                                       args=(writer_factory, self.frames, self.filled, self.free,
+                                             self.audio_queue, self.results))
+        self.process.start()
+
+    def start(self):
+        pass  # The worker is already waiting for frames
+
+    def submit(self, surface, repeat=1, timestamp=None):
+        """See VideoEncoder.submit."""
+        index = None
+        if timestamp is not None and self.clock is not None:
+            index = self.clock.frame_index(timestamp)
+            if index < self.next_index:
+                self.frames_skipped += 1
+                return False
+            self.next_index = index + 1
+            repeat = 1
+        for _ in range(repeat):
+            self.frames_submitted += 1
+            try:
+                slot = self.free.get() if self.policy == "block" else self.free.get_nowait()
+            except queue.Empty:
+                self.frames_dropped += 1
+                continue
+            frame, conversion = grab_frame(surface, out=self.frames[slot])
+            self.filled.put((slot, frame.shape[2], conversion, index))
+        return True
+
+    def close_audio(self):
+        """Ends the audio stream of the writer, see FFmpegWriter.close_audio."""
+        if self.audio_queue is not None and not self.audio_closed:
+            self.audio_closed = True
+            self.audio_queue.put(None)
+
+    def stats(self):
+        """Returns the encoder counters as a dict, the worker's ones once it stopped."""
+        return {
+            "frames_submitted": self.frames_submitted,
+            "frames_written": self.result.get("frames_written"),
+            "frames_dropped": self.frames_dropped,
+            "frames_skipped": self.frames_skipped,
+            "frames_repeated": self.result.get("frames_repeated"),
+        }
+
+    def stop(self):
+        """Lets the worker write the frames still queued, then waits for it to release the writer."""
+        if self.process.is_alive():
+            self.close_audio()
+            self.filled.put(None)
+            try:
+                self.result = self.results.get(timeout=30)
+            except queue.Empty:
+                print("Encoder worker did not finish in time")
+            self.process.join(10)
+        self.frames.close()
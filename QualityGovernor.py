@@ -0,0 +1,79 @@
+import time
+from collections import deque
+
+## Quality levels from best to cheapest, each one keeps the savings of the previous ones
+## - camera_interval: refresh the camera background every n frames, the last one is blitted again in between.
+## - ocean_alpha: blend the ocean with its alpha channel, or blit the colorkeyed copy (binary transparency, much cheaper).
+## - record_interval: record every n-th video slot, the encoder repeats the previous frame over the others.
+QUALITY_LEVELS = (
+    {"name": "full", "camera_interval": 1, "ocean_alpha": True, "record_interval": 1},
+    {"name": "camera/2", "camera_interval": 2, "ocean_alpha": True, "record_interval": 1},
+    {"name": "opaque ocean", "camera_interval": 2, "ocean_alpha": False, "record_interval": 1},
+    {"name": "record/2", "camera_interval": 2, "ocean_alpha": False, "record_interval": 2},
+    {"name": "camera/4", "camera_interval": 4, "ocean_alpha": False, "record_interval": 2},
+)
+
+class QualityGovernor:
+    """
+    Watches the time each frame takes (without the wait for the next one) and picks the quality level that fits the frame budget.
+    When the p90 of the last `window` frames goes over `high` of the budget the quality steps down one level,
+    when it stays under `low` of the budget for `hold` frames it steps back up. Every transition is printed and kept in transitions,
+    so an underpowered machine shows up in the logs.
+    budget_ms: float - The frame budget, e.g. 1000 / tick_rate (Game), the longest frame that still keeps up with the recording.
+    levels: tuple, default=QUALITY_LEVELS - The settings of each level, from best to cheapest.
+    window: int, default=30 - The number of frames the p90 is taken over.
+    high: float, default=0.9 - Step down above this fraction of the budget.
+    low: float, default=0.5 - Step up below this fraction of the budget.
+    cooldown: int, default=60 - Frames to wait after a transition before stepping down again, so its effect can show.
+    hold: int, default=300 - Frames of headroom needed before stepping up.
+    """
+    def __init__(self, budget_ms, levels=QUALITY_LEVELS, window=30, high=0.9, low=0.5, cooldown=60, hold=300):
+        self.budget_ms = budget_ms
+        self.levels = levels
+        self.high = high
+        self.low = low
+        self.cooldown = cooldown
+        self.hold = hold
+        self.samples = deque(maxlen=window)
+        self.level = 0
+        self.frames_since_change = 0
+        self.frames_with_headroom = 0
+        self.transitions = []  # (perf_counter time, from level, to level, p90 ms)
+
+    @property
+    def settings(self):
+        """The settings of the current level."""
+        return self.levels[self.level]
+
+    def observe(self, frame_ms):
+        """
+        Adds the time of one frame and changes the level if needed.
+        Returns True when the level changed.
+        """
+        self.samples.append(frame_ms)
+        self.frames_since_change += 1
+        if len(self.samples) < self.samples.maxlen:
+            return False
+
+        p90 = sorted(self.samples)[int(len(self.samples) * 0.9)]
+        if p90 < self.low * self.budget_ms:
+            self.frames_with_headroom += 1
+        else:
+            self.frames_with_headroom = 0
+
+        if p90 > self.high * self.budget_ms and self.frames_since_change >= self.cooldown and self.level < len(self.levels) - 1:
+            self.change(self.level + 1, p90)
+            return True
+        if self.frames_with_headroom >= self.hold and self.level > 0:
+            self.change(self.level - 1, p90)
+            return True
+        return False
+
+    def change(self, level, p90):
+        print(f"Quality {self.levels[self.level]['name']} -> {self.levels[level]['name']} "
+              f"(p90 frame {p90:.1f} ms, budget {self.budget_ms:.1f} ms)")
+        self.transitions.append((time.perf_counter(), self.level, level, round(p90, 2)))
+        self.level = level
+        self.frames_since_change = 0
+        self.frames_with_headroom = 0
+        self.samples.clear()
@@ -0,0 +1,104 @@
+"""
+Offline re-rendering of a traced session (Game(trace=True)).
+The session is simulated again from its replay.jsonl, tick by tick with the recorded volumes, and composited again over the
+recorded camera stream (camera.avi), without a window and as fast as the machine goes. The recorded audio is muxed back in.
+The simulation only depends on the volumes, so the replay ends in exactly the recorded game state, which is checked at the end.
+
+Usage: python Replay.py [session_dir] [output.avi]
+"""
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import cv2
+from Ambario import Game, combine_audio_video
+from InputTrace import load_trace
+from Level import LEVEL_FILE
+from MediaClock import MediaClock
+from VideoEncoder import VideoEncoder
+
+def rerender(directory, output_path=None):
+    """
+    Re-renders the traced session in directory to output_path (default replay_output.avi in the same directory).
+    Returns True if the replay ended in the recorded game state.
+    """
+    header, volumes, frames, events, end = load_trace(directory)
+    tick_rate = header["tick_rate"]
+    output_path = output_path or os.path.join(directory, "replay_output.avi")
+    game = Game(live=False, seed=header["seed"], tick_rate=tick_rate, fps=None, output_dir=directory, adaptive_quality=False,
+                level=header.get("level", LEVEL_FILE))
+
+    # The same slot logic as the live recording, on a clock whose time is the slot number
+    clock = MediaClock(tick_rate, 44100)
+    clock.start(0)
+    video_path = os.path.join(directory, "replay_video.avi")
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"XVID"), tick_rate, (640, 480))
+    encoder = VideoEncoder(writer, max_queue=30, policy="block", clock=clock)
+    encoder.start()
+    camera = cv2.VideoCapture(os.path.join(directory, header["camera"]))
+    camera_slot = -1
+    camera_frame = None
+
+    start = time.perf_counter()
+    ticks = 0
+    for record in frames:
+        while ticks < record["tick"]:
+            game.timer.start_frame()
+            game.step(volumes[ticks])
+            ticks += 1
+
+        # camera.avi has one frame per slot
+        while camera_slot < record["frame"]:
+            ret, image = camera.read()
+            if not ret:
+                break
+            camera_frame = image
+            camera_slot += 1
+
+        game.timer.start_frame()
+        if record["camera"] and camera_frame is not None:
+            game.screen.blit(game.camera_surface.update(camera_frame), (0, 0))
+        else:
+            game.screen.fill([0, 0, 0])
+        if ticks > 0:  # The countdown frames show no world
+            game.draw_world(record["alpha"])
+        for text, size, color, position in record["overlay"]:
+            game.overlay_text(text, size, tuple(color), tuple(position))
+        game.update_hud(game.current_volume)
+        encoder.submit(game.screen, timestamp=(record["frame"] + 0.5) / tick_rate)
+
+    # Ticks after the last recorded frame, e.g. the game ended between two frames
+    while ticks < len(volumes):
+        game.timer.start_frame()
+        game.step(volumes[ticks])
+        ticks += 1
+    encoder.stop()
+    camera.release()
+    elapsed = time.perf_counter() - start
+
+    audio_path = os.path.join(directory, header["audio"])
+    if os.path.exists(audio_path):
+        combine_audio_video(video_path, audio_path, output_path, mode="remux")
+        os.remove(video_path)
+    else:
+        os.replace(video_path, output_path)
+
+    state = json.loads(json.dumps(game.state()))
+    print(f"Replayed {ticks} ticks and {len(frames)} frames in {elapsed:.2f} s "
+          f"({len(frames) / tick_rate / max(elapsed, 1e-9):.1f}x real time), events: {[event['event'] for event in events]}")
+    if end is None:
+        print("The trace has no final state (the session did not finish), nothing to compare")
+        return False
+    if state != end:
+        print("Replay diverged, recorded", end, "replayed", state)
+        return False
+    print("Replay matches the recorded state:", state)
+    return True
+
+if __name__ == "__main__":
+    directory = sys.argv[1] if len(sys.argv) > 1 else "output"
+    matched = rerender(directory, sys.argv[2] if len(sys.argv) > 2 else None)
+    sys.exit(0 if matched else 1)
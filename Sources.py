@@ -0,0 +1,185 @@
+"""
+Stand-in input sources, so the game can run without a webcam or a microphone (benchmarks, CI, replays).
+The cameras have the read/release interface of cv2.VideoCapture and can be given to CameraCapture.
+The audio streams have the read/stop_stream/close interface of a PyAudio input stream and can be given to AudioRecorder.
+"""
+
+import cv2
+import time
+import wave
+import numpy as np
+
+class Pacer:
+    """
+    Sleeps so that calls happen at most `rate` times per second. A rate of None never sleeps (unthrottled).
+    """
+    def __init__(self, rate):
+        self.period = 1 / rate if rate else 0
+        self.next_time = None
+
+    def wait(self):
+        if not self.period:
+            return
+        now = time.perf_counter()
+        if self.next_time is None:
+            self.next_time = now
+        if self.next_time > now:
+            time.sleep(self.next_time - now)
+        self.next_time = max(self.next_time + self.period, now - self.period)
+
+class SyntheticCamera:
+    """
+    Fake camera producing a moving test pattern, no device needed.
+    size: tuple, default=(640, 480) - The (width, height) of the frames.
+    fps: float, default=30 - The frame rate of the camera, None gives frames as fast as they are read.
+    """
+    def __init__(self, size=(640, 480), fps=30):
+        self.size = size
+        self.pacer = Pacer(fps)
+        self.frame_index = 0
+        x = np.linspace(0, 255, size[0], dtype=np.uint8)
+        y = np.linspace(0, 255, size[1], dtype=np.uint8)
+        self.pattern = np.dstack([
+            np.broadcast_to(x, (size[1], size[0])),
+            np.broadcast_to(y[:, None], (size[1], size[0])),
+            np.full((size[1], size[0]), 96, dtype=np.uint8),
+        ])
+
+    def isOpened(self):
+        return True
+
+    def read(self, image=None):
+        self.pacer.wait()
+        if image is None or image.shape != self.pattern.shape:
+            image = np.empty_like(self.pattern)
+        # A bar moving across the gradient, so consecutive frames differ
+        np.copyto(image, self.pattern)
+        bar = (self.frame_index * 8) % self.size[0]
+        image[:, bar:bar + 16] = 255
+        self.frame_index += 1
+        return True, image
+
+    def release(self):
+        pass
+
+class FileCamera:
+    """
+    Camera reading frames from a video file, looping at the end.
+    path: str - The video file.
+    fps: float, default=None - Paces the frames like a real camera, None reads as fast as possible.
+    loop: bool, default=True - Restart from the beginning at the end of the file.
+    """
+    def __init__(self, path, fps=None, loop=True):
+        self.path = path
+        self.loop = loop
+        self.pacer = Pacer(fps)
+        self.video_cap = cv2.VideoCapture(path)
+
+    def isOpened(self):
+        return self.video_cap.isOpened()
+
+    def read(self, image=None):
+        self.pacer.wait()
+        ret, frame = self.video_cap.read(image)
+        if not ret and self.loop:
+            self.video_cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.video_cap.read(image)
+        return ret, frame
+
+    def release(self):
+        self.video_cap.release()
+
+class SyntheticStream:
+    """
+    Fake int16 mono microphone stream: quiet noise with a loud tone burst at a fixed interval.
+    rate: int, default=44100 - The sampling rate.
+    burst_every: float, default=1.0 - Seconds between the starts of two bursts, None for silence only.
+    burst_length: float, default=0.3 - The length of a burst in seconds.
+    burst_level: int, default=6000 - The amplitude of the burst (the scream threshold is an RMS of 500).
+    realtime: bool, default=True - Block in read like a real device, False returns the samples immediately.
+    seed: int, default=0 - Seed of the background noise.
+
+    burst_times keeps the perf_counter time each burst started, the moment its first sample would have reached a real device
+    (only in realtime mode), so latency can be measured from it.
+    """
+    def __init__(self, rate=44100, burst_every=1.0, burst_length=0.3, burst_level=6000, realtime=True, seed=0):
+        self.rate = rate
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.burst_level = burst_level
+        self.realtime = realtime
+        self.position = 0  # Samples produced so far
+        self.start_time = None
+        self.rng = np.random.default_rng(seed)
+        self.burst_times = []
+
+    def read(self, num_frames, exception_on_overflow=True):
+        if self.realtime:
+            if self.start_time is None:
+                self.start_time = time.perf_counter()
+            ready_at = self.start_time + (self.position + num_frames) / self.rate
+            delay = ready_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        samples = self.rng.integers(-50, 50, num_frames).astype(np.int16)
+        if self.burst_every:
+            t = (self.position + np.arange(num_frames)) / self.rate
+            in_burst = (t % self.burst_every) < self.burst_length
+            if self.realtime:
+                period = self.burst_every * self.rate
+                burst = int(np.ceil(self.position / period))
+                while burst * period < self.position + num_frames:
+                    self.burst_times.append(self.start_time + burst * self.burst_every)
+                    burst += 1
+            if in_burst.any():
+                tone = (np.sin(2 * np.pi * 440 * t) * self.burst_level).astype(np.int16)
+                samples = np.where(in_burst, tone, samples)
+        self.position += num_frames
+        return samples.tobytes()
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass
+
+class WavStream:
+    """
+    Microphone stream reading an int16 mono WAV file, looping at the end.
+    path: str - The WAV file.
+    realtime: bool, default=True - Block in read like a real device, False returns the samples immediately.
+    """
+    def __init__(self, path, realtime=True, loop=True):
+        self.wavefile = wave.open(path, "rb")
+        if self.wavefile.getsampwidth() != 2 or self.wavefile.getnchannels() != 1:
+            raise ValueError(f"{path} must be 16-bit mono")
+        self.rate = self.wavefile.getframerate()
+        self.realtime = realtime
+        self.loop = loop
+        self.position = 0
+        self.start_time = None
+
+    def read(self, num_frames, exception_on_overflow=True):
+        if self.realtime:
+            if self.start_time is None:
+                self.start_time = time.perf_counter()
+            delay = self.start_time + (self.position + num_frames) / self.rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        data = self.wavefile.readframes(num_frames)
+        while len(data) < num_frames * 2:
+            if not self.loop:
+                data += bytes(num_frames * 2 - len(data))
+                break
+            self.wavefile.rewind()
+            data += self.wavefile.readframes(num_frames - len(data) // 2)
+        self.position += num_frames
+        return data
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        self.wavefile.close()
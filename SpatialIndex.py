@@ -0,0 +1,53 @@
+from bisect import bisect_left, bisect_right
+
+class IntervalIndex:
+    """
+    Broad-phase index over level objects, sorted by the left edge of their rect.
+    A query is a binary search for the horizontal span followed by a scan of the few objects in it,
+    so the cost depends on how many objects are near the query and not on the length of the level.
+    items: list - The objects to index.
+    key: callable, default=None - Returns the Rect of an item, None means the items are Rects themselves.
+    """
+    def __init__(self, items, key=None):
+        self.key = key if key is not None else (lambda item: item)
+        self.items = sorted(items, key=lambda item: self.key(item).left)
+        self.rects = [self.key(item) for item in self.items]
+        self.lefts = [rect.left for rect in self.rects]
+        # The widest object, anything starting further left than that can't reach into the query span
+        self.max_width = max((rect.width for rect in self.rects), default=0)
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, item):
+        """Inserts an item after the ones with the same left edge, so adding in x order keeps the order of a fresh index."""
+        rect = self.key(item)
+        index = bisect_right(self.lefts, rect.left)
+        self.items.insert(index, item)
+        self.rects.insert(index, rect)
+        self.lefts.insert(index, rect.left)
+        # max_width only grows, a stale larger value just makes the search start a little further left
+        self.max_width = max(self.max_width, rect.width)
+
+    def remove(self, item):
+        """Removes an item, found by identity among the items with its left edge. Raises ValueError if it isn't there."""
+        left = self.key(item).left
+        for index in range(bisect_left(self.lefts, left), bisect_right(self.lefts, left)):
+            if self.items[index] is item:
+                del self.items[index], self.rects[index], self.lefts[index]
+                return
+        raise ValueError(f"{item!r} is not in the index")
+
+    def span(self, left, right):
+        """Returns the (start, end) slice of the items that may overlap the horizontal span [left, right)."""
+        return bisect_left(self.lefts, left - self.max_width + 1), bisect_left(self.lefts, right)
+
+    def in_span(self, left, right):
+        """Returns the items whose rect overlaps the horizontal span [left, right), ignoring the vertical position."""
+        start, end = self.span(left, right)
+        return [item for item, rect in zip(self.items[start:end], self.rects[start:end]) if rect.right > left]
+
+    def query(self, rect):
+        """Returns the items whose rect collides with the given rect."""
+        start, end = self.span(rect.left, rect.right)
+        return [self.items[i] for i in range(start, end) if rect.colliderect(self.rects[i])]
@@ -1,5 +1,5 @@
 import pygame
-import time
+from Assets import assets
 
 class Block(pygame.sprite.Sprite):
     """
@@ -8,12 +8,18 @@ class Block(pygame.sprite.Sprite):
     def __init__(self, x, y):
         super().__init__()
         self.images = [
-            pygame.image.load("Model/piranha_frame_1.png").convert_alpha(),
-            pygame.image.load("Model/piranha_frame_2.png").convert_alpha()
+            assets.get("Model/piranha_frame_1.png"),
+            assets.get("Model/piranha_frame_2.png")
         ]
         self.image = self.images[0]
         self.rect = self.image.get_rect(midbottom=(x, y))
         self.index = 0
+
+    def reset(self, x, y):
+        """Puts a block back in its initial state at a new position, for reuse from an object pool."""
+        self.image = self.images[0]
+        self.rect.midbottom = (x, y)
+        self.index = 0
     
     def update(self):
         self.index += 0.1
@@ -35,15 +41,17 @@ class Player(pygame.sprite.Sprite):
     - invincible: Boolean to check if the player is invincible.
     - invincible_duration: The duration of invincibility.
     - last_hit_time: The time of the last hit.
+    - clock: The simulation time in seconds, advanced by update. Invincibility runs on it and not on the wall clock,
+      so a replay of the same ticks gives the same result however fast it runs.
     """
     def __init__(self):
         super().__init__()
         self.player_walk = [
-            pygame.image.load('Model/Mario - Walk1.gif').convert_alpha(),
-            pygame.image.load('Model/Mario - Walk2.gif').convert_alpha(),
-            pygame.image.load('Model/Mario - Walk3.gif').convert_alpha()
+            assets.get("Model/Mario - Walk1.gif"),
+            assets.get("Model/Mario - Walk2.gif"),
+            assets.get("Model/Mario - Walk3.gif")
         ]
-        self.player_jump = pygame.image.load("Model/Mario - Jump.gif").convert_alpha()
+        self.player_jump = assets.get("Model/Mario - Jump.gif")
         self.image = self.player_walk[0]
         self.rect = self.image.get_rect(midbottom=(100, 350))
         self.gravity = 0
@@ -53,6 +61,7 @@ class Player(pygame.sprite.Sprite):
         self.invincible = False
         self.invincible_duration = 2  # seconds
         self.last_hit_time = 0
+        self.clock = 0
 
     def apply_gravity(self):
         self.gravity += 1
@@ -68,17 +77,19 @@ class Player(pygame.sprite.Sprite):
 
     def hit(self):
         self.invincible = True
-        self.last_hit_time = time.time()
+        self.last_hit_time = self.clock
 
-    def update(self):
+    def update(self, dt=1 / 15):
         """
         Methods to update the player state. 
         This includes applying gravity, changing the player image, and checking for invincibility.
+        dt: float, default=1/15 - The length of the simulation tick in seconds.
         """
+        self.clock += dt
         if not self.dead:
             self.apply_gravity()
             self.animation_state()
-            if self.invincible and (time.time() - self.last_hit_time) > self.invincible_duration:
+            if self.invincible and (self.clock - self.last_hit_time) > self.invincible_duration:
                 self.invincible = False
         else:
             self.apply_gravity()
@@ -0,0 +1,73 @@
+import pygame
+from collections import OrderedDict
+
+class TextCache:
+    """
+    Cache for the text drawn on top of the game (HUD, countdown and messages).
+    - Fonts are created once per size.
+    - Rendered strings are kept in an LRU cache keyed by (text, size, color).
+    - Numbers are drawn from pre-rendered digit glyphs, so a changing score never renders a new surface.
+    max_surfaces: int, default=64 - The number of rendered strings kept before the least recently used one is evicted.
+    font_name: str, default=None - The font file, None is pygame's default font.
+    """
+    def __init__(self, max_surfaces=64, font_name=None):
+        self.max_surfaces = max_surfaces
+        self.font_name = font_name
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.digits = {}
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, size):
+        """Returns the font for this size, creating it the first time."""
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(self.font_name, size)
+        return font
+
+    def render(self, text, size, color):
+        """Returns the rendered surface for this text, from the cache when possible."""
+        key = (text, size, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = self.surfaces[key] = self.font(size).render(text, True, color)
+        if len(self.surfaces) > self.max_surfaces:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def glyphs(self, size, color):
+        """Returns the pre-rendered glyphs for "0"-"9" and "-" at this size and color."""
+        key = (size, tuple(color))
+        glyphs = self.digits.get(key)
+        if glyphs is None:
+            font = self.font(size)
+            glyphs = self.digits[key] = {char: font.render(char, True, color) for char in "0123456789-"}
+        return glyphs
+
+    def draw(self, screen, text, size, color, center):
+        """Draws the text centered on a position."""
+        surface = self.render(text, size, color)
+        screen.blit(surface, surface.get_rect(center=center))
+
+    def draw_label(self, screen, label, value, size, color, topleft):
+        """
+        Draws "label" followed by an integer value at a top-left position.
+        The label comes from the cache and the value is blitted glyph by glyph.
+        """
+        label_surface = self.render(label, size, color)
+        screen.blit(label_surface, topleft)
+        x = topleft[0] + label_surface.get_width()
+        glyphs = self.glyphs(size, color)
+        for char in str(int(value)):
+            glyph = glyphs[char]
+            screen.blit(glyph, (x, topleft[1]))
+            x += glyph.get_width()
+
+    def stats(self):
+        """Returns the cache counters as a dict."""
+        return {"hits": self.hits, "misses": self.misses, "cached_surfaces": len(self.surfaces)}
@@ -0,0 +1,159 @@
+import cv2
+import queue
+import threading
+import numpy as np
+import pygame
+
+POLICIES = ("block", "drop_oldest", "drop_newest")
+
+def grab_frame(surface, out=None):
+    """
+    Copies the pixels of a pygame surface into a new numpy array, as cheap as possible for the main thread.
+    On the usual 32-bit display (XRGB in memory as B, G, R, X) this is a single memcpy of the raw buffer, giving (height, width, 4) BGRX.
+    Any other layout falls back to pygame.image.tobytes in RGB, giving (height, width, 3) RGB.
+    out: np.ndarray, default=None - A (height, width, 4) uint8 array to copy into instead, e.g. a slot of shared memory.
+        The returned frame is then a view of it.
+    Returns (frame, conversion) where conversion is the cv2 color code that turns the frame into BGR.
+    """
+    width, height = surface.get_size()
+    if surface.get_bytesize() == 4 and surface.get_masks()[:3] == (0xFF0000, 0xFF00, 0xFF):
+        buffer = surface.get_buffer()
+        pixels = np.frombuffer(buffer, dtype=np.uint8).reshape(height, surface.get_pitch() // 4, 4)
+        if out is None:
+            frame = pixels[:, :width].copy()
+        else:
+            frame = out
+            np.copyto(frame, pixels[:, :width])
+        del pixels, buffer  # Release the buffer so the surface is unlocked again
+        return frame, cv2.COLOR_BGRA2BGR
+    frame = np.frombuffer(pygame.image.tobytes(surface, "RGB"), dtype=np.uint8).reshape(height, width, 3)
+    if out is not None:
+        np.copyto(out[:, :, :3], frame)
+        frame = out[:, :, :3]
+    return frame, cv2.COLOR_RGB2BGR
+
+class VideoEncoder(threading.Thread):
+    """
+    Separate thread that encodes the composited game frames, so the game loop never waits on the codec.
+    The main thread only copies the screen (see grab_frame) and puts it into a bounded queue. The color conversion and the
+    writer.write call happen here.
+    writer: object - Anything with write(frame) and release(), e.g. cv2.VideoWriter. Frames are given as BGR.
+    max_queue: int, default=30 - The maximum number of frames waiting to be encoded (2 seconds at 15 fps).
+    policy: str, default="drop_oldest" - What to do when the queue is full:
+        - "block": wait for the encoder (the old behaviour, the game slows down to the codec speed).
+        - "drop_oldest": throw away the oldest waiting frame to make room.
+        - "drop_newest": throw away the frame being submitted.
+    clock: MediaClock, default=None - With a clock, frames submitted with a timestamp go to the video slot of that time:
+        empty slots repeat the previous frame and a frame for a slot that already has one is skipped, so the video keeps
+        real time even when frames come late or are dropped from the queue.
+    """
+    def __init__(self, writer, max_queue=30, policy="drop_oldest", clock=None):
+        super(VideoEncoder, self).__init__(daemon=True)
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r}, expected one of {POLICIES}")
+        self.writer = writer
+        self.clock = clock
+        self.next_index = 0  # The first slot without a submitted frame
+        self.policy = policy
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.frames_submitted = 0
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.frames_skipped = 0
+        self.frames_repeated = 0
+        self.max_depth = 0
+
+    def submit(self, surface, repeat=1, timestamp=None):
+        """
+        Copies the surface and queues it for encoding, applying the overflow policy if the queue is full.
+        repeat: int, default=1 - Encode the frame this many times, to keep a constant frame rate when the game skipped frames.
+        timestamp: float, default=None - The perf_counter time of the frame, placed by the clock instead of repeat.
+        Returns False when the frame was skipped because its slot already has one.
+        """
+        return self.place(surface, grab_frame, repeat, timestamp)
+
+    def submit_frame(self, frame, timestamp=None):
+        """Like submit, for a BGR numpy frame (e.g. a camera frame) instead of a surface. The frame is copied."""
+        return self.place(frame, lambda frame: (frame.copy(), None), 1, timestamp)
+
+    def place(self, source, grab, repeat, timestamp):
+        """Copies the source with grab, which returns (frame, conversion), and queues it in its slot or repeat times."""
+        if timestamp is not None and self.clock is not None:
+            index = self.clock.frame_index(timestamp)
+            if index < self.next_index:
+                self.frames_skipped += 1  # Its slot already has a frame, don't even copy the screen
+                return False
+            self.next_index = index + 1
+            self.put(grab(source) + (index,))
+            return True
+        item = grab(source) + (None,)
+        for _ in range(repeat):
+            self.put(item)
+        return True
+
+    def put(self, item):
+        self.frames_submitted += 1
+        if self.policy == "block":
+            self.queue.put(item)
+        else:
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                if self.policy == "drop_newest":
+                    self.frames_dropped += 1
+                else:
+                    try:
+                        self.queue.get_nowait()
+                        self.frames_dropped += 1
+                    except queue.Empty:
+                        pass
+                    self.queue.put_nowait(item)
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def run(self):
+        """
+        Background thread to convert and write the queued frames until the stop sentinel arrives.
+        A timestamped frame first fills the slots before its own with the last written frame.
+        """
+        last = None
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            frame, conversion, index = item
+            if conversion is not None:
+                frame = cv2.cvtColor(frame, conversion)
+            if index is not None:
+                while self.frames_written < index:
+                    self.writer.write(frame if last is None else last)
+                    self.frames_written += 1
+                    self.frames_repeated += 1
+            self.writer.write(frame)
+            self.frames_written += 1
+            last = frame
+
+    @property
+    def depth(self):
+        """The number of frames currently waiting to be encoded."""
+        return self.queue.qsize()
+
+    def stats(self):
+        """Returns the encoder counters as a dict."""
+        return {
+            "frames_submitted": self.frames_submitted,
+            "frames_written": self.frames_written,
+            "frames_dropped": self.frames_dropped,
+            "frames_skipped": self.frames_skipped,
+            "frames_repeated": self.frames_repeated,
+            "queue_depth": self.depth,
+            "max_queue_depth": self.max_depth,
+        }
+
+    def stop(self):
+        """
+        Flushes the frames that are still queued, then releases the writer.
+        """
+        if self.is_alive():
+            self.queue.put(None)
+            self.join()
+        self.writer.release()
@@ -0,0 +1,100 @@
+import pygame
+from SpatialIndex import IntervalIndex
+
+class Camera:
+    """
+    The scrolling camera. The level stays still in world coordinates and only the camera offset moves,
+    so scrolling is one addition per frame instead of moving every rect of the level.
+    width: int - The width of the viewport in pixels.
+    height: int - The height of the viewport in pixels.
+    """
+    def __init__(self, width, height):
+        self.x = 0
+        self.previous_x = 0
+        self.width = width
+        self.height = height
+
+    def scroll(self, dx):
+        """Moves the camera to the right by dx pixels."""
+        self.x += dx
+
+    def begin_step(self):
+        """Remembers the position at the start of a simulation tick, for interpolation."""
+        self.previous_x = self.x
+
+    def interpolated_x(self, alpha):
+        """The camera position between the previous tick (alpha=0) and the current one (alpha=1)."""
+        return round(self.previous_x + (self.x - self.previous_x) * alpha)
+
+    @property
+    def viewport(self):
+        """The part of the world on screen, as a Rect in world coordinates."""
+        return pygame.Rect(self.x, 0, self.width, self.height)
+
+    @property
+    def swept_viewport(self):
+        """The viewports of the previous and the current tick together, everything an interpolated frame can show."""
+        left = min(self.previous_x, self.x)
+        return pygame.Rect(left, 0, max(self.previous_x, self.x) - left + self.width, self.height)
+
+    def to_screen(self, rect):
+        """Returns a copy of a world rect in screen coordinates."""
+        return rect.move(-self.x, 0)
+
+    def to_world(self, rect):
+        """Returns a copy of a screen rect in world coordinates."""
+        return rect.move(self.x, 0)
+
+class World:
+    """
+    The level geometry in world coordinates: platforms, the pipes under them, the blocks and the castle.
+    Each kind is kept in an IntervalIndex, so finding what is on screen or what the player touches is a binary search,
+    the cost of a frame depends on what is on screen and not on the length of the level.
+    platforms: list of Rect - The platforms.
+    pipes: list of Rect - The pipes drawn under the platforms.
+    blocks: list of Block - The enemies, their rect is in world coordinates.
+    castle: Rect - The castle at the end of the level, None for an endless level.
+    """
+    def __init__(self, platforms, pipes, blocks, castle):
+        self.platforms = IntervalIndex(platforms)
+        self.pipes = IntervalIndex(pipes)
+        self.blocks = IntervalIndex(blocks, key=lambda block: block.rect)
+        self.castle = castle
+
+    def add(self, platforms=(), pipes=(), blocks=()):
+        """Adds level objects, e.g. a chunk coming into range (see LevelStreamer)."""
+        for platform in platforms:
+            self.platforms.add(platform)
+        for pipe in pipes:
+            self.pipes.add(pipe)
+        for block in blocks:
+            self.blocks.add(block)
+
+    def remove(self, platforms=(), pipes=(), blocks=()):
+        """Removes level objects that were added before, the same objects and not equal copies."""
+        for platform in platforms:
+            self.platforms.remove(platform)
+        for pipe in pipes:
+            self.pipes.remove(pipe)
+        for block in blocks:
+            self.blocks.remove(block)
+
+    def visible_platforms(self, viewport):
+        return self.platforms.in_span(viewport.left, viewport.right)
+
+    def visible_pipes(self, viewport):
+        return self.pipes.in_span(viewport.left, viewport.right)
+
+    def visible_blocks(self, viewport):
+        return self.blocks.in_span(viewport.left, viewport.right)
+
+    def castle_visible(self, viewport):
+        return self.castle is not None and self.castle.colliderect(viewport)
+
+    def platforms_near(self, rect):
+        """Returns the platforms colliding with a rect, the broad-phase candidates for collision response."""
+        return self.platforms.query(rect)
+
+    def blocks_near(self, rect):
+        """Returns the blocks colliding with a rect."""
+        return self.blocks.query(rect)
@@ -0,0 +1,93 @@
+"""
+Benchmark of the asset pack (AssetPack.py) against decoding the image files.
+- Cold load: a fresh Python process per run opens the display and loads every GAME_ASSETS image through AssetManager,
+  from the files or from Model/assets.pack. The median of the runs is reported (the OS file cache is warm after the first one).
+- Blend cost: the per-frame blits of the game with each set of surfaces, the ocean at (0, 165), where Game puts it
+  (trimmed from the pack), and the sprites of a typical frame, timed separately.
+
+Usage: python benchmarks/bench_assets.py [--runs 5] [--frames 2000]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import pygame
+from AssetPack import ASSET_PACK
+from Assets import AssetManager, GAME_ASSETS
+
+def load_all(pack):
+    """Loads every game image like Game.__init__ does. Returns the seconds it took."""
+    start = time.perf_counter()
+    manager = AssetManager(pack=pack)
+    manager.preload(GAME_ASSETS)
+    for path, size in GAME_ASSETS:
+        manager.get(path, size)
+    elapsed = time.perf_counter() - start
+    manager.shutdown()
+    return elapsed
+
+def cold_load(pack, runs):
+    times = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, __file__, "--child", pack or ""], cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout
+        times.append(float(output.split()[-1]))
+    return statistics.median(times) * 1000
+
+def blit_time(screen, blits, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        for surface, position in blits:
+            screen.blit(surface, position)
+    return (time.perf_counter() - start) / frames * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per cold load measurement")
+    parser.add_argument("--frames", type=int, default=2000, help="Frames per blend measurement")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    pygame.display.init()
+    screen = pygame.display.set_mode((640, 480))
+    if args.child is not None:
+        print(load_all(args.child or None))
+        return
+    if not os.path.exists(os.path.join(ROOT, ASSET_PACK)):
+        print(f"No {ASSET_PACK}, build it first: python AssetPack.py")
+        return
+    os.chdir(ROOT)
+
+    print(f"Cold load of {len(GAME_ASSETS)} images (median of {args.runs} processes):")
+    print(f"  image files {cold_load(None, args.runs):8.2f} ms")
+    print(f"  asset pack  {cold_load(ASSET_PACK, args.runs):8.2f} ms")
+
+    files = AssetManager(pack=None)
+    packed = AssetManager()
+    files.preload(GAME_ASSETS)
+    packed.preload(GAME_ASSETS)
+    ocean, (ocean_x, ocean_y) = packed.get_trimmed("Model/ocean-1.png", (640, 480))
+    groups = {
+        "ocean": ([(files.get("Model/ocean-1.png", (640, 480)), (0, 165))], [(ocean, (ocean_x, 165 + ocean_y))]),
+    }
+    sprites = [("Model/ground.png", (200, 50), (100, 350)), ("Model/ground.png", (200, 50), (400, 300)),
+               ("Model/Pipe.gif", (120, 400), (140, 400)), ("Model/Pipe.gif", (120, 400), (440, 350)),
+               ("Model/Castle.png", (100, 100), (500, 160)), ("Model/Mario - Walk1.gif", None, (84, 318)),
+               ("Model/piranha_frame_1.png", None, (434, 252)), ("Model/piranha_frame_2.png", None, (560, 202))]
+    groups["sprites"] = tuple([(manager.get(path, size), position) for path, size, position in sprites]
+                              for manager in (files, packed))
+    print("Blend cost per frame:")
+    for name, (from_files, from_pack) in groups.items():
+        before = blit_time(screen, from_files, args.frames)
+        after = blit_time(screen, from_pack, args.frames)
+        print(f"  {name:<8} image files {before:7.3f} ms   asset pack {after:7.3f} ms   {before / after:5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark for the camera-to-surface step of Game.run.
+Compares the old path (cvtColor + np.rot90 + surfarray.make_surface) with CameraSurface,
+reporting the per-frame time and how many bytes each path allocates per frame.
+
+Usage: python benchmarks/bench_camera_blit.py [frames]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import cv2
+import numpy as np
+import pygame
+from CameraCapture import CameraSurface
+
+def legacy_blit(screen, frame):
+    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    frame = np.rot90(frame)
+    frame_surface = pygame.surfarray.make_surface(frame)
+    screen.blit(frame_surface, (0, 0))
+
+def measure(name, step, frames):
+    step()  # Warm up
+    start = time.perf_counter()
+    for _ in range(frames):
+        step()
+    elapsed = (time.perf_counter() - start) / frames
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[1]
+    tracemalloc.reset_peak()
+    for _ in range(10):
+        step()
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    print(f"{name:>14}: {elapsed * 1000:7.3f} ms/frame, peak allocation {peak / 1024:8.1f} KiB")
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    pygame.init()
+    screen = pygame.display.set_mode((640, 480))
+    frame = np.random.default_rng(0).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+
+    # Both paths must draw the exact same picture
+    legacy_blit(screen, frame)
+    expected = pygame.surfarray.array3d(screen)
+    camera_surface = CameraSurface((640, 480))
+    screen.blit(camera_surface.update(frame), (0, 0))
+    assert np.array_equal(expected, pygame.surfarray.array3d(screen)), "CameraSurface output differs from the legacy path"
+
+    measure("legacy", lambda: legacy_blit(screen, frame), frames)
+    measure("CameraSurface", lambda: screen.blit(camera_surface.update(frame), (0, 0)), frames)
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
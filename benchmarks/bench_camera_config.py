@@ -0,0 +1,80 @@
+"""
+Benchmark of the camera capture settings (see CameraCapture.open_camera).
+For each combination of pixel format, capture size and driver buffer size it opens the camera, reads what the device accepted,
+then reads frames for a few seconds the way the capture thread does (read_frame, including the scaling to 640x480) and reports:
+- the throughput in frames per second,
+- the time spent in read_frame per frame,
+- the age of each frame when read_frame returns, from the driver timestamp (V4L2 stamps buffers with the monotonic clock,
+  other backends may not give one, the column is then empty). A deep driver buffer shows up here as stale frames.
+
+Usage: python benchmarks/bench_camera_config.py [--device 0] [--seconds 3]
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import cv2
+import numpy as np
+from CameraCapture import open_camera, read_frame
+
+FOURCCS = ("MJPG", "YUYV")
+SIZES = ((640, 480), (1280, 720))
+BUFFER_SIZES = (1, 4)
+
+def measure(device, settings, seconds):
+    video_cap, accepted = open_camera(device, settings)
+    if not video_cap.isOpened():
+        return None
+    buffer = np.zeros((480, 640, 3), dtype=np.uint8)
+    width, height = accepted["size"]
+    raw = np.zeros((height, width, 3), dtype=np.uint8) if (width, height) != (640, 480) and width and height else None
+
+    read_frame(video_cap, buffer, raw)  # The first frame includes the stream start
+    read_times = []
+    ages = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        before = time.perf_counter()
+        if not read_frame(video_cap, buffer, raw):
+            continue
+        now = time.perf_counter()
+        read_times.append(now - before)
+        stamp = video_cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        if 0 < now - stamp < 5:  # Only a timestamp on the monotonic clock makes sense here
+            ages.append(now - stamp)
+    elapsed = time.perf_counter() - start
+    video_cap.release()
+    return accepted, len(read_times) / elapsed, read_times, ages
+
+def percentiles(values):
+    if not values:
+        return "       -       -"
+    p50, p95 = np.percentile(np.array(values) * 1000, [50, 95])
+    return f"{p50:8.1f}{p95:8.1f}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--device", type=int, default=0, help="Camera index")
+    parser.add_argument("--seconds", type=float, default=3, help="Seconds of capture per configuration")
+    args = parser.parse_args()
+
+    for index, (fourcc, size, buffer_size) in enumerate(itertools.product(FOURCCS, SIZES, BUFFER_SIZES)):
+        settings = {"fourcc": fourcc, "size": size, "fps": 30, "buffer_size": buffer_size}
+        result = measure(args.device, settings, args.seconds)
+        if result is None:
+            print(f"Could not open camera {args.device}")
+            return
+        if index == 0:
+            print(f"{'requested':<26}{'accepted':<30}{'fps':>6}{'read p50':>10}{'p95':>8}{'age p50':>10}{'p95':>8}")
+        requested = f"{fourcc} {size[0]}x{size[1]} buf {buffer_size}"
+        accepted, fps, read_times, ages = result
+        accepted_text = (f"{accepted['fourcc']} {accepted['size'][0]}x{accepted['size'][1]} "
+                         f"{accepted['fps']:.0f} fps buf {accepted['buffer_size']}")
+        print(f"{requested:<26}{accepted_text:<30}{fps:6.1f}  {percentiles(read_times)}  {percentiles(ages)}")
+
+if __name__ == "__main__":
+    main()
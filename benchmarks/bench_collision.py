@@ -0,0 +1,50 @@
+"""
+Micro-benchmark for the collision broad phase.
+Compares testing the player against every platform (the old Game.run loop) with the IntervalIndex query,
+for levels growing from the current 8 platforms up to 10,000.
+
+Usage: python benchmarks/bench_collision.py [queries]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from SpatialIndex import IntervalIndex
+
+def make_level(count, seed=0):
+    """Platforms laid out like the real level, roughly 300 px apart at heights between 175 and 350."""
+    rng = random.Random(seed)
+    return [pygame.Rect(100 + i * 300 + rng.randint(-50, 50), rng.randint(175, 350), 200, 50) for i in range(count)]
+
+def brute_force(platforms, rect):
+    return [platform for platform in platforms if rect.colliderect(platform)]
+
+def main():
+    queries = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"{'platforms':>10} {'brute force':>14} {'IntervalIndex':>14} {'speedup':>8}")
+    for count in (8, 100, 1000, 10000):
+        platforms = make_level(count)
+        index = IntervalIndex(platforms)
+        level_width = platforms[-1].right
+        rng = random.Random(1)
+        players = [pygame.Rect(rng.randint(0, level_width), rng.randint(150, 350), 24, 32) for _ in range(queries)]
+        for player in players:
+            assert sorted(map(tuple, brute_force(platforms, player))) == sorted(map(tuple, index.query(player)))
+
+        start = time.perf_counter()
+        for player in players:
+            brute_force(platforms, player)
+        brute = (time.perf_counter() - start) / queries
+
+        start = time.perf_counter()
+        for player in players:
+            index.query(player)
+        indexed = (time.perf_counter() - start) / queries
+        print(f"{count:>10} {brute * 1e6:>11.2f} us {indexed * 1e6:>11.2f} us {brute / indexed:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
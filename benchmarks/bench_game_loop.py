@@ -0,0 +1,56 @@
+"""
+Headless benchmark of the whole Game.run loop.
+Uses the SDL dummy video driver, a SyntheticCamera (or a video file) and a SyntheticStream (or a WAV file),
+and runs the game unthrottled to report how many frames per second the loop can do on this machine.
+The player may die before the frame budget is used up, so sessions are repeated until it is.
+
+Usage: python benchmarks/bench_game_loop.py [--frames N] [--camera video.avi] [--audio voice.wav] [--record stream|legacy]
+                                              [--pipeline threads|processes]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # The assets are loaded relative to the repository
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+from Ambario import Game
+from Sources import FileCamera, SyntheticCamera, SyntheticStream, WavStream
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=600, help="Total number of game frames to run")
+    parser.add_argument("--camera", help="Video file used as the camera, default is a synthetic pattern")
+    parser.add_argument("--audio", help="16-bit mono WAV used as the microphone, default is synthetic bursts")
+    parser.add_argument("--burst-every", type=float, default=0.3, help="Seconds between synthetic scream bursts")
+    parser.add_argument("--record", default="stream", choices=("stream", "legacy"), help="Game record_mode")
+    parser.add_argument("--pipeline", default="threads", choices=("threads", "processes"), help="Game pipeline")
+    args = parser.parse_args()
+
+    frames = 0
+    elapsed = 0
+    sessions = 0
+    with tempfile.TemporaryDirectory() as output_dir:
+        while frames < args.frames:
+            if args.camera and args.pipeline == "processes":
+                camera = args.camera  # The worker opens the file itself, an opened FileCamera can't be pickled
+            else:
+                camera = FileCamera(args.camera, fps=30) if args.camera else SyntheticCamera(fps=30)
+            # With the default 0.3 s bursts every 0.3 s the tone is steady and keeps the player jumping
+            audio_stream = WavStream(args.audio) if args.audio else SyntheticStream(burst_every=args.burst_every)
+            game = Game(record_mode=args.record, postprocess="remux", camera=camera, audio_stream=audio_stream,
+                        fps=None, countdown_seconds=0, message_duration=0, output_dir=output_dir, pipeline=args.pipeline)
+            game.run(max_frames=args.frames - frames)
+            elapsed += game.loop_seconds
+            frames += game.frame_count
+            sessions += 1
+
+    print(f"{frames} frames in {elapsed:.2f} s over {sessions} session(s): {frames / elapsed:.1f} fps, "
+          f"{elapsed / frames * 1000:.2f} ms/frame")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark of drawing the static level: one blit per visible platform and pipe (the old Game.draw_world loop) against
+the LevelCompositor strip tiles, at growing numbers of platforms per screen.
+The camera scrolls over the whole level at the game speed of 5 px per frame, the compositor times include rendering
+the tiles as they scroll in. Per frame the mean, p95 and max are reported, the max of the compositor is a tile render.
+
+Usage: python benchmarks/bench_level_draw.py [--screens 50] [--speed 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+import pygame
+from LevelCompositor import LevelCompositor
+from World import World
+
+def make_level(per_screen, screens, platform_image, pipe_image, seed=0):
+    """Platforms at the heights of the real level, per_screen of them in every 640 px, each with its pipe."""
+    rng = random.Random(seed)
+    platforms = []
+    pipes = []
+    for i in range(per_screen * screens):
+        platform = platform_image.get_rect(topleft=(i * 640 // per_screen + rng.randint(0, 40), rng.randint(175, 350)))
+        platforms.append(platform)
+        pipes.append(pipe_image.get_rect(midtop=platform.midbottom))
+    castle = pygame.Rect(platforms[-1].centerx - 50, platforms[-1].top - 95, 100, 100)
+    return World(platforms, pipes, [], castle)
+
+def per_object(screen, world, images, offset):
+    platform_image, pipe_image, castle_image = images
+    viewport = pygame.Rect(offset, 0, 640, 480)
+    for platform in world.visible_platforms(viewport):
+        screen.blit(platform_image, platform.move(-offset, 0))
+    for pipe in world.visible_pipes(viewport):
+        screen.blit(pipe_image, pipe.move(-offset, 0))
+    if world.castle_visible(viewport):
+        screen.blit(castle_image, world.castle.move(-offset, 0))
+
+def run(draw, screen, offsets):
+    times = []
+    for offset in offsets:
+        screen.fill((40, 80, 120))
+        start = time.perf_counter()
+        draw(offset)
+        times.append(time.perf_counter() - start)
+    times = np.array(times) * 1000
+    return times.mean(), np.percentile(times, 95), times.max()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--screens", type=int, default=50, help="Length of each level in screens of 640 px")
+    parser.add_argument("--speed", type=int, default=5, help="Camera pixels per frame")
+    args = parser.parse_args()
+
+    pygame.display.init()
+    screen = pygame.display.set_mode((640, 480))
+    images = (pygame.transform.scale(pygame.image.load("Model/ground.png").convert_alpha(), (200, 50)),
+              pygame.transform.scale(pygame.image.load("Model/Pipe.gif").convert_alpha(), (120, 400)),
+              pygame.transform.scale(pygame.image.load("Model/Castle.png").convert_alpha(), (100, 100)))
+
+    print(f"{'per screen':>10} {'per object mean/p95/max':>26} {'compositor mean/p95/max':>26} {'tiles':>6}")
+    for per_screen in (2, 4, 8, 16, 32):
+        world = make_level(per_screen, args.screens, images[0], images[1])
+        offsets = range(0, (args.screens - 1) * 640, args.speed)
+        objects = run(lambda offset: per_object(screen, world, images, offset), screen, offsets)
+        compositor = LevelCompositor(world, *images)
+        tiled = run(lambda offset: compositor.draw(screen, offset, 640), screen, offsets)
+        print(f"{per_screen:>10} {objects[0]:>9.3f} {objects[1]:>7.3f} {objects[2]:>7.3f} ms"
+              f" {tiled[0]:>9.3f} {tiled[1]:>7.3f} {tiled[2]:>7.3f} ms {compositor.tiles_rendered:>6}")
+
+if __name__ == "__main__":
+    main()
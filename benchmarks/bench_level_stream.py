@@ -0,0 +1,102 @@
+"""
+Benchmark of the chunked level loading (Level.py) against building the whole level up front, as Game.__init__ used to.
+For level files of growing length it reports:
+- the start time: reading the file up to the first screen and filling the World (streamed),
+  or reading it whole and building every platform, pipe and Block (up front),
+- the peak Python memory of that start (tracemalloc),
+- then, streamed only, scrolling over the first --scroll screens at 5 px per tick: the mean and max time of
+  LevelStreamer.update per tick, and the most objects that were in the World at once.
+
+Usage: python benchmarks/bench_level_stream.py [--scroll 200]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # The assets are loaded relative to the repository
+
+import pygame
+from Level import LevelStreamer, open_level, write_level
+from Sprite import Block
+from World import Camera, World
+
+PLATFORM_SIZE = (200, 50)
+PIPE_SIZE = (120, 400)
+
+def make_level(path, screens, seed=0):
+    """Writes a level with the density of level1: a platform every 300 px and a block on every third one."""
+    rng = random.Random(seed)
+    platforms = [(100 + i * 300 + rng.randint(-50, 50), rng.randint(175, 350)) for i in range(screens * 640 // 300)]
+    blocks = [(x + 100, y) for x, y in platforms[1::3]]
+    write_level(path, platforms, blocks, (platforms[-1][0] + 100, platforms[-1][1] + 5))
+
+def up_front(path):
+    """The old way: every object of the level built before the game starts."""
+    header, chunks = open_level(path)
+    platforms = []
+    pipes = []
+    blocks = []
+    for chunk in chunks:
+        for x, y in chunk["platforms"]:
+            platforms.append(pygame.Rect((x, y), PLATFORM_SIZE))
+            pipes.append(pygame.Rect((0, 0), PIPE_SIZE))
+            pipes[-1].midtop = platforms[-1].midbottom
+        blocks.extend(Block(x, y) for x, y in chunk["blocks"])
+    return World(platforms, pipes, blocks, pygame.Rect(0, 0, 100, 100))
+
+def streamed(path, camera):
+    header, chunks = open_level(path)
+    world = World([], [], [], pygame.Rect(0, 0, 100, 100))
+    streamer = LevelStreamer(world, chunks, PLATFORM_SIZE, PIPE_SIZE, lookahead=camera.width)
+    streamer.update(camera.viewport)
+    return world, streamer
+
+def measure_start(build):
+    gc.collect()  # Don't time the collection of the previous level
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed * 1000, peak / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scroll", type=int, default=200, help="Screens scrolled over after the start")
+    args = parser.parse_args()
+
+    pygame.display.init()
+    pygame.display.set_mode((640, 480))
+    print(f"{'screens':>8} {'file':>9} {'up front start/peak':>22} {'streamed start/peak':>22} "
+          f"{'update mean/max':>18} {'max objects':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for screens in (10, 100, 1000, 10000):
+            path = os.path.join(directory, f"level{screens}.jsonl")
+            make_level(path, screens)
+            eager_ms, eager_kb = measure_start(lambda: up_front(path))[1:]
+
+            camera = Camera(640, 480)
+            (world, streamer), stream_ms, stream_kb = measure_start(lambda: streamed(path, camera))
+            update_times = []
+            most_objects = 0
+            for _ in range(min(args.scroll, screens) * 640 // 5):
+                camera.scroll(5)
+                start = time.perf_counter()
+                streamer.update(camera.viewport)
+                update_times.append(time.perf_counter() - start)
+                most_objects = max(most_objects, len(world.platforms) + len(world.pipes) + len(world.blocks))
+            print(f"{screens:>8} {os.path.getsize(path) / 1024:>6.0f} kB {eager_ms:>9.2f} ms {eager_kb:>7.0f} kB "
+                  f"{stream_ms:>9.2f} ms {stream_kb:>7.0f} kB {sum(update_times) / len(update_times) * 1e6:>7.1f} "
+                  f"{max(update_times) * 1e6:>6.0f} us {most_objects:>12}")
+
+if __name__ == "__main__":
+    main()
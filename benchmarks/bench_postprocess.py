@@ -0,0 +1,52 @@
+"""
+Benchmark for the combine_audio_video post-processing modes.
+Runs every mode on a reference recording and reports the wall time and the output size.
+The x264 modes are run once per encoder thread count of --threads (0 lets ffmpeg pick one per core),
+the remux mode only copies the video and is run once.
+By default it uses the sample session in output/ (output.avi + output.wav).
+
+Usage: python benchmarks/bench_postprocess.py [video_path audio_path] [--moviepy] [--threads 0,1,2,4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from Ambario import POSTPROCESS_PRESETS, combine_audio_video
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video_path", nargs="?", default=os.path.join(ROOT, "output", "output.avi"))
+    parser.add_argument("audio_path", nargs="?", default=os.path.join(ROOT, "output", "output.wav"))
+    parser.add_argument("--moviepy", action="store_true", help="Also time the old moviepy re-encode")
+    parser.add_argument("--threads", default="0,1,2,4", help="Comma-separated encoder thread counts for the x264 modes")
+    args = parser.parse_args()
+    thread_counts = [int(count) for count in args.threads.split(",")]
+
+    runs = []
+    for mode in POSTPROCESS_PRESETS:
+        if "libx264" in POSTPROCESS_PRESETS[mode]:
+            runs.extend((mode, threads) for threads in thread_counts)
+        else:
+            runs.append((mode, 0))
+    if args.moviepy:
+        runs.append(("moviepy", 0))
+
+    print(f"Reference: {args.video_path} ({os.path.getsize(args.video_path) / 1e6:.1f} MB), {args.audio_path}, "
+          f"{os.cpu_count()} cores")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, threads in runs:
+            output_path = os.path.join(tmp, f"{mode}_{threads}.avi")
+            start = time.perf_counter()
+            combine_audio_video(args.video_path, args.audio_path, output_path, mode=mode, threads=threads)
+            elapsed = time.perf_counter() - start
+            thread_text = f"threads {threads}" if mode not in ("remux", "moviepy") else ""
+            print(f"{mode:>10} {thread_text:<10}: {elapsed:7.2f} s, {os.path.getsize(output_path) / 1e6:7.2f} MB")
+
+if __name__ == "__main__":
+    main()
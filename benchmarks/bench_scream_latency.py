@@ -0,0 +1,124 @@
+"""
+End-to-end scream-to-jump latency harness.
+Feeds AudioRecorder a SyntheticStream with loud bursts at known perf_counter times, runs the real Game loop in real time
+and records, for every burst, when the jump was applied in Game.step and when that frame was presented.
+The level is replaced by one endless floor so the player never dies and can jump at every burst.
+With --pipeline processes the stream is read in the audio worker process, so it records the burst times into a
+managed list shared with this process (perf_counter is the same system-wide monotonic clock in both).
+
+The bursts are spaced by the airtime of a jump plus a second, so the player has landed when the next one starts.
+Bursts that gave no jump within a second are counted as unmatched.
+
+Usage: python benchmarks/bench_scream_latency.py [--seconds 40] [--mode callback|blocking] [--frames-per-buffer 1048]
+                                                 [--hop-size 256] [--fps 60] [--tick-rate 15] [--record stream|legacy]
+                                                 [--pipeline threads|processes]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # The assets are loaded relative to the repository
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import time
+from Ambario import Game
+from Sources import SyntheticCamera, SyntheticStream
+from Level import write_level
+from ProcessPipeline import CONTEXT
+
+# A burst's RMS is about 4200, the jump force then comes to about -20 and the player is 40 ticks in the air
+AIRTIME_TICKS = 40
+
+def write_floor(path, length):
+    """Writes a level of platforms side by side at y=350, one floor over length pixels with the castle far behind it."""
+    write_level(path, [(x, 350) for x in range(-200, length, 200)], [], (length + 10 ** 6, 355))
+
+class LatencyGame(Game):
+    """Game on an endless floor (see write_floor) that timestamps every jump and the presentation of the frame showing it."""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.jump_times = []
+        self.present_times = []
+        self.waiting_for_present = False
+
+    def step(self):
+        player = self.player.sprite
+        was_rising = player.gravity < 0
+        super().step()
+        if player.gravity < 0 and not was_rising:
+            self.jump_times.append(time.perf_counter())
+            self.waiting_for_present = True
+
+    def present(self):
+        super().present()
+        if self.waiting_for_present:
+            self.present_times.append(time.perf_counter())
+            self.waiting_for_present = False
+
+def summary(name, values):
+    values = np.array(values) * 1000
+    if len(values) == 0:
+        return f"{name:>18}: no samples"
+    return (f"{name:>18}: p50 {np.percentile(values, 50):6.1f}  p95 {np.percentile(values, 95):6.1f}  "
+            f"max {values.max():6.1f} ms  (n={len(values)})")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=40, help="Length of the session")
+    parser.add_argument("--mode", default="callback", choices=("callback", "blocking"), help="AudioRecorder mode")
+    parser.add_argument("--frames-per-buffer", type=int, default=1048, help="Block size of the blocking mode")
+    parser.add_argument("--hop-size", type=int, default=256, help="Hop size of the callback mode")
+    parser.add_argument("--fps", type=int, default=60, help="Render frame rate")
+    parser.add_argument("--tick-rate", type=int, default=15, help="Simulation tick rate")
+    parser.add_argument("--record", default="stream", choices=("stream", "legacy"), help="Game record_mode")
+    parser.add_argument("--pipeline", default="threads", choices=("threads", "processes"), help="Game pipeline")
+    args = parser.parse_args()
+
+    # A burst that starts in the air gives no jump, so they are spaced by the airtime and a second to land
+    stream = SyntheticStream(burst_every=AIRTIME_TICKS / args.tick_rate + 1, burst_length=0.2)
+    manager = None
+    if args.pipeline == "processes":
+        manager = CONTEXT.Manager()
+        stream.burst_times = manager.list()  # Appended to by the copy of the stream in the audio worker
+    with tempfile.TemporaryDirectory() as output_dir:
+        level = os.path.join(output_dir, "floor.jsonl")
+        write_floor(level, int(args.seconds * args.tick_rate * 5) + 1280)
+        game = LatencyGame(level=level, record_mode=args.record, camera=SyntheticCamera(fps=30), audio_stream=stream,
+                           audio_options={"mode": args.mode, "frames_per_buffer": args.frames_per_buffer,
+                                          "hop_size": args.hop_size},
+                           fps=args.fps, tick_rate=args.tick_rate, countdown_seconds=0, message_duration=0,
+                           output_dir=output_dir, pipeline=args.pipeline)
+        game.run(max_frames=int(args.seconds * args.fps))
+    burst_times = list(stream.burst_times)
+    if manager is not None:
+        manager.shutdown()
+
+    # Match every jump with the burst right before it
+    to_jump = []
+    to_present = []
+    bursts = list(burst_times)
+    for jump_time, present_time in zip(game.jump_times, game.present_times):
+        earlier = [burst for burst in bursts if burst <= jump_time]
+        if not earlier or jump_time - earlier[-1] > 1.0:
+            continue
+        to_jump.append(jump_time - earlier[-1])
+        to_present.append(present_time - earlier[-1])
+        bursts.remove(earlier[-1])
+
+    print(f"mode={args.mode} frames_per_buffer={args.frames_per_buffer} hop_size={args.hop_size} "
+          f"fps={args.fps} tick_rate={args.tick_rate} record={args.record} pipeline={args.pipeline}")
+    print(f"{len(burst_times)} bursts, {len(game.jump_times)} jumps, {len(to_jump)} matched, "
+          f"{len(bursts)} bursts unmatched")
+    print(summary("burst -> jump", to_jump))
+    print(summary("burst -> presented", to_present))
+    publish = game.audio_recorder.latency_stats()  # Measured where the recorder runs, in the worker with processes
+    if publish:
+        print(f"{'block -> published':>18}: p50 {publish['p50']:6.1f}  p95 {publish['p95']:6.1f}  max {publish['max']:6.1f} ms")
+
+if __name__ == "__main__":
+    main()
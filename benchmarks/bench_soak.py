@@ -0,0 +1,124 @@
+"""
+Soak test of the endless mode (Game(level="endless")).
+Runs the real Game loop with a SyntheticCamera, a SyntheticStream and the recording on, for --minutes of wall time.
+An autopilot screams at the end of every platform, so the player keeps going. It doesn't dodge the blocks, so its lives
+are set out of reach. Every --every seconds it prints:
+- the frames of the interval and their p50/p95/max work time (the frame without the wait for the next one),
+- the resident memory of the process,
+- the level objects in the World, the compositor tiles and the object pool counters.
+At the end it compares the second interval (after warm-up) with the last one. Memory and frame time should stay flat:
+the level streams through a bounded World and pools, the tiles are evicted, the encoder and recorder queues are bounded.
+With --fps 0 the loop runs unthrottled, one tick per frame, which soaks more game time in the same wall time.
+
+Usage: python benchmarks/bench_soak.py [--minutes 30] [--every 60] [--fps 60] [--seed 1] [--pipeline threads|processes]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # The assets are loaded relative to the repository
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import numpy as np
+import pygame
+from Ambario import Game
+from Level import ENDLESS
+from Sources import SyntheticCamera, SyntheticStream
+
+def resident_mb():
+    """The resident memory of this process in MB, from /proc (Linux), else the peak from getrusage."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+class SoakGame(Game):
+    """Endless Game played by an autopilot, sampling the frame time and the memory every report_every seconds."""
+    def __init__(self, minutes, report_every, **kwargs):
+        super().__init__(level=ENDLESS, **kwargs)
+        self.lives = 10 ** 9
+        self.minutes = minutes
+        self.report_every = report_every
+        self.frame_times = []
+        self.reports = []  # (minutes, frames, p50, p95, max ms, resident MB)
+        self.soak_start = None
+        self.next_report = None
+
+    def autopilot(self):
+        """Returns a scream volume when the player is about to run off the end of the platform it stands on."""
+        player = self.player.sprite
+        if not player.on_ground:
+            return 0
+        world_rect = self.camera.to_world(player.rect)
+        under = self.world.platforms_near(pygame.Rect(world_rect.left, world_rect.bottom, world_rect.width, 2))
+        if under and max(platform.right for platform in under) - world_rect.right < 3 * self.platform_speed:
+            return 1000
+        return 0
+
+    def step(self):
+        super().step(self.autopilot())
+
+    def record(self):
+        super().record()
+        now = time.perf_counter()
+        self.frame_times.append(self.timer.frame_ms())
+        if self.soak_start is None:
+            self.soak_start = now
+            self.next_report = now + self.report_every
+        elif now >= self.next_report:
+            self.report(now)
+            self.next_report += self.report_every
+            if now - self.soak_start >= self.minutes * 60:
+                self.running = False
+
+    def report(self, now):
+        times = np.array(self.frame_times)
+        self.frame_times = []
+        p50, p95 = np.percentile(times, [50, 95])
+        memory = resident_mb()
+        objects = len(self.world.platforms) + len(self.world.pipes) + len(self.world.blocks)
+        pools = [self.level.platform_pool, self.level.pipe_pool, self.level.block_pool]
+        created = "/".join(str(pool.created) for pool in pools)
+        reused = sum(pool.reused for pool in pools)
+        self.reports.append(((now - self.soak_start) / 60, len(times), p50, p95, times.max(), memory))
+        print(f"{(now - self.soak_start) / 60:7.1f} min {len(times):>7} frames {p50:6.2f} {p95:6.2f} {times.max():7.2f} ms "
+              f"{memory:8.1f} MB  objects {objects:>3} tiles {len(self.level_compositor.tiles)} "
+              f"pools created {created} reused {reused}  camera x {self.camera.x}", flush=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=30, help="Wall time of the soak")
+    parser.add_argument("--every", type=float, default=60, help="Seconds between reports")
+    parser.add_argument("--fps", type=int, default=60, help="Render frame rate, 0 runs unthrottled")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the endless level")
+    parser.add_argument("--pipeline", default="threads", choices=("threads", "processes"), help="Game pipeline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        game = SoakGame(args.minutes, args.every, camera=SyntheticCamera(fps=30),
+                        audio_stream=SyntheticStream(burst_every=None), fps=args.fps or None, countdown_seconds=0,
+                        message_duration=0, output_dir=output_dir, pipeline=args.pipeline, adaptive_quality=False,
+                        seed=args.seed)
+        print(f"{'elapsed':>11} {'frames':>7} {'p50':>13} {'p95':>6} {'max':>7}")
+        game.run()
+
+    if game.player.sprite.dead:
+        print(f"The player died after {game.tick_count} ticks, the soak ended early")
+    if len(game.reports) < 3:
+        print("Too short to compare, run more than two report intervals")
+        return
+    first, last = game.reports[1], game.reports[-1]
+    print(f"From {first[0]:.1f} to {last[0]:.1f} min ({game.tick_count} ticks, {game.tick_count / game.tick_rate / 60:.1f} "
+          f"game minutes): resident memory {first[5]:.1f} -> {last[5]:.1f} MB ({last[5] - first[5]:+.1f} MB), "
+          f"p50 {first[2]:.2f} -> {last[2]:.2f} ms, p95 {first[3]:.2f} -> {last[3]:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import os
+import sys
+import threading
+import time
+import wave
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AudioRecorder import AudioRecorder
+
+class FakeCallbackStream:
+    """Pushes blocks of hop_size samples into recorder.callback like PyAudio, and one more block while stop_stream runs."""
+    def __init__(self, hop_size=256):
+        self.hop_size = hop_size
+        self.recorder = None
+        self.running = False
+        self.thread = None
+
+    def push(self, value):
+        block = np.full(self.hop_size, value, dtype=np.int16).tobytes()
+        self.recorder.callback(block, self.hop_size, {}, 0)
+
+    def start_stream(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.deliver)
+        self.thread.start()
+
+    def deliver(self):
+        while self.running:
+            self.push(100)
+            time.sleep(0.005)
+
+    def stop_stream(self):
+        self.running = False
+        self.thread.join()
+        self.push(7)  # A callback still in flight when stop is called
+
+    def close(self):
+        pass
+
+def test_callback_block_during_stop_reaches_file(tmp_path):
+    filename = str(tmp_path / "output.wav")
+    stream = FakeCallbackStream()
+    recorder = AudioRecorder(filename=filename, stream=stream, mode="callback")
+    stream.recorder = recorder
+    recorder.pushes_blocks = True
+    recorder.pa_continue, recorder.pa_complete = 0, 1
+    recorder.start()
+    time.sleep(0.05)
+    recorder.stop()
+    recorder.save()
+
+    with wave.open(filename) as file:
+        samples = np.frombuffer(file.readframes(file.getnframes()), dtype=np.int16)
+    assert len(samples) % stream.hop_size == 0
+    assert (samples[-stream.hop_size:] == 7).all()